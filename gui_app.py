@@ -14,8 +14,10 @@ import webbrowser
 
 # Importar módulos del sistema
 sys.path.append(str(Path(__file__).parent / "scripts"))
-from webpage_print_to_pdf import export_urls
-from funding_pdf_extractor import process_pdf_folder
+from webpage_print_to_pdf import iter_export_urls
+from funding_pdf_extractor import process_pdf_folder, list_documents
+from pipeline import run_pipeline
+from listing_crawler import discover_urls, remember_exported
 import config
 
 class FundingOpportunitiesApp:
@@ -133,7 +135,7 @@ class FundingOpportunitiesApp:
         self.create_export_tab()
         
         self.tab_process = ttk.Frame(notebook)
-        notebook.add(self.tab_process, text="🤖 Analizar PDFs")
+        notebook.add(self.tab_process, text="🤖 Analizar documentos")
         self.create_process_tab()
         
         self.tab_pipeline = ttk.Frame(notebook)
@@ -193,7 +195,7 @@ class FundingOpportunitiesApp:
         # Instrucciones
         ttk.Label(
             frame,
-            text="Ingresa las URLs que deseas convertir a PDF",
+            text="Ingresa las URLs que deseas exportar (PDF, o HTML si la página es estática)",
             style='Header.TLabel'
         ).grid(row=0, column=0, sticky=tk.W, pady=(0, 10))
         
@@ -235,11 +237,18 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         
         ttk.Button(
             button_frame,
-            text="🚀 Exportar a PDF",
+            text="🚀 Exportar URLs",
             command=self.start_export,
             style='Success.TButton'
         ).pack(side=tk.RIGHT, padx=5)
         
+        ttk.Button(
+            button_frame,
+            text="🔎 Rastrear fuentes",
+            command=self.start_crawl,
+            style='Primary.TButton'
+        ).pack(side=tk.RIGHT, padx=5)
+        
         # Barra de progreso
         self.export_progress = ttk.Progressbar(frame, mode='indeterminate')
         self.export_progress.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=10)
@@ -258,7 +267,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         # Instrucciones
         ttk.Label(
             frame,
-            text="Analiza PDFs con Inteligencia Artificial",
+            text="Analiza documentos (PDF y HTML) con Inteligencia Artificial",
             style='Header.TLabel'
         ).grid(row=0, column=0, sticky=tk.W, pady=(0, 10))
         
@@ -268,7 +277,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         
         self.pdf_count_label = ttk.Label(
             info_frame,
-            text="PDFs disponibles: Calculando...",
+            text="Documentos disponibles: Calculando...",
             font=('Arial', 10)
         )
         self.pdf_count_label.pack(anchor=tk.W, pady=5)
@@ -286,7 +295,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         ).pack(anchor=tk.W, pady=5)
         
         # Lista de PDFs
-        list_frame = ttk.LabelFrame(frame, text="PDFs detectados", padding=10)
+        list_frame = ttk.LabelFrame(frame, text="Documentos detectados", padding=10)
         list_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         list_frame.grid_rowconfigure(0, weight=1)
         list_frame.grid_columnconfigure(0, weight=1)
@@ -336,7 +345,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         # Título
         ttk.Label(
             frame,
-            text="Pipeline Completo: URLs → PDFs → Análisis",
+            text="Pipeline Completo: URLs → Documentos → Análisis",
             style='Header.TLabel'
         ).grid(row=0, column=0, sticky=tk.W, pady=(0, 15))
         
@@ -344,7 +353,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         flow_frame = tk.Frame(frame, bg=self.colors['light'], relief=tk.RIDGE, bd=2)
         flow_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=15, padx=10)
         
-        steps = ["📝 URLs", "📄 PDFs", "🤖 IA", "📊 Reportes"]
+        steps = ["📝 URLs", "📄 Documentos", "🤖 IA", "📊 Reportes"]
         
         for i, step in enumerate(steps):
             step_label = tk.Label(
@@ -815,9 +824,9 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
                 messagebox.showerror("Error", f"No se pudo cargar el archivo:\n{str(e)}")
     
     def update_pdf_count(self):
-        """Actualiza el conteo de PDFs"""
-        pdfs = list(config.PDFS_SALIDA.glob("*.pdf"))
-        self.pdf_count_label.config(text=f"PDFs disponibles: {len(pdfs)}")
+        """Actualiza el conteo de documentos (PDF y HTML)"""
+        pdfs = list_documents(config.PDFS_SALIDA)
+        self.pdf_count_label.config(text=f"Documentos disponibles: {len(pdfs)}")
         
         self.pdf_listbox.delete(0, tk.END)
         for pdf in pdfs:
@@ -895,7 +904,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         
         response = messagebox.askyesno(
             "Confirmar exportación",
-            f"¿Exportar {len(urls)} URLs a PDF?\n\nEsto puede tomar varios minutos."
+            f"¿Exportar {len(urls)} URLs?\n\nEsto puede tomar varios minutos."
         )
         
         if not response:
@@ -908,26 +917,68 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         thread.daemon = True
         thread.start()
     
+    def start_crawl(self):
+        """Rastrea las fuentes de listados (LISTING_SOURCES) y exporta lo encontrado"""
+        if self.is_processing:
+            messagebox.showwarning("Procesando", "Ya hay un proceso en ejecución")
+            return
+        
+        self.is_processing = True
+        self.export_progress.start()
+        
+        thread = threading.Thread(target=self.crawl_thread)
+        thread.daemon = True
+        thread.start()
+    
+    def crawl_thread(self):
+        try:
+            discovered = discover_urls(log=self.log)
+        except Exception as e:
+            error_msg = str(e)
+            self.log(f"❌ Error en el rastreo: {error_msg}", 'error')
+            self.root.after(0, lambda msg=error_msg: messagebox.showerror("Error", msg))
+            self.is_processing = False
+            self.root.after(0, self.export_progress.stop)
+            return
+        
+        if not discovered:
+            self.log("ℹ️ No se encontraron URLs nuevas para exportar")
+            self.is_processing = False
+            self.root.after(0, self.export_progress.stop)
+            return
+        
+        urls = [url for url, _ in discovered]
+        
+        def show_urls():
+            self.urls_text.delete(1.0, tk.END)
+            self.urls_text.insert(1.0, "\n".join(urls))
+        self.root.after(0, show_urls)
+        
+        resultados = self.export_thread(urls)
+        remember_exported(discovered, resultados)
+    
     def export_thread(self, urls):
+        resultados = []
         try:
             self.log(f"🚀 Iniciando exportación de {len(urls)} URLs...")
             
-            resultados = export_urls(urls)
+            exitosos = 0
             
-            exitosos = sum(1 for r in resultados if r['status'] == 'success')
-            errores = len(urls) - exitosos
-            
-            self.log(f"✅ Exportación completada: {exitosos} exitosos, {errores} errores")
-            
-            for r in resultados:
+            # Cada resultado llega en cuanto su documento está escrito
+            for n, r in enumerate(iter_export_urls(urls), 1):
+                resultados.append(r)
                 if r['status'] == 'success':
-                    self.log(f"✅ {r['filename']}")
+                    exitosos += 1
+                    self.log(f"✅ [{n}/{len(urls)}] {r['filename']}")
+                    self.root.after(0, self.update_pdf_count)
                 else:
-                    self.log(f"❌ Error: {r['message'][:100]}", 'error')
+                    self.log(f"❌ [{n}/{len(urls)}] Error: {r['message'][:100]}", 'error')
             
-            self.root.after(0, self.update_pdf_count)
+            errores = len(urls) - exitosos
+            
+            self.log(f"✅ Exportación completada: {exitosos} exitosos, {errores} errores")
             
-            success_msg = f"✅ {exitosos} PDFs creados\n❌ {errores} errores"
+            success_msg = f"✅ {exitosos} documentos creados\n❌ {errores} errores"
             self.root.after(0, lambda msg=success_msg: messagebox.showinfo(
                 "Exportación completada", msg
             ))
@@ -940,6 +991,8 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         finally:
             self.is_processing = False
             self.root.after(0, self.export_progress.stop)
+        
+        return resultados
     
     def start_processing(self):
         """Inicia el procesamiento de PDFs"""
@@ -947,18 +1000,18 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
             messagebox.showwarning("Procesando", "Ya hay un proceso en ejecución")
             return
         
-        pdfs = list(config.PDFS_SALIDA.glob("*.pdf"))
+        pdfs = list_documents(config.PDFS_SALIDA)
         
         if not pdfs:
             messagebox.showwarning(
-                "No hay PDFs",
-                f"No se encontraron PDFs en {config.PDFS_SALIDA}"
+                "No hay documentos",
+                f"No se encontraron documentos (PDF o HTML) en {config.PDFS_SALIDA}"
             )
             return
         
         response = messagebox.askyesno(
             "Confirmar análisis",
-            f"¿Analizar {len(pdfs)} PDFs con IA?\n\n"
+            f"¿Analizar {len(pdfs)} documentos con IA?\n\n"
             f"Modelo: {config.OPENAI_MODEL}"
         )
         
@@ -982,12 +1035,12 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
             total_opps = resultado.get('total_opportunities', 0)
             total_pdfs = resultado.get('total_pdfs', 0)
             
-            self.log(f"✅ Completado: {total_pdfs} PDFs, {total_opps} oportunidades")
+            self.log(f"✅ Completado: {total_pdfs} documentos, {total_opps} oportunidades")
             
             self.root.after(0, self.load_results)
             self.root.after(0, lambda: messagebox.showinfo(
                 "Análisis completado",
-                f"✅ {total_pdfs} PDFs procesados\n💰 {total_opps} oportunidades"
+                f"✅ {total_pdfs} documentos procesados\n💰 {total_opps} oportunidades"
             ))
             
         except Exception as e:
@@ -1034,24 +1087,15 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
         try:
             self.log("🔄 PIPELINE INICIADO")
             
-            # Exportar
-            self.log(f"[1/2] Exportando {len(urls)} URLs...")
-            resultados_export = export_urls(urls)
-            
-            exitosos = sum(1 for r in resultados_export if r['status'] == 'success')
+            # Exportar y analizar solapados: cada documento se analiza al terminar
+            self.log(f"Exportando {len(urls)} URLs y analizando cada documento al terminar...")
+            resultado = run_pipeline(urls, log=self.log)
             
-            if exitosos == 0:
-                self.log("❌ No se pudo exportar ningún PDF", 'error')
+            if resultado.get('error'):
+                self.log("❌ No se pudo exportar ningún documento", 'error')
                 return
             
-            self.log(f"✅ {exitosos} PDFs creados")
-            
-            # Procesar
-            import time
-            time.sleep(2)
-            
-            self.log("[2/2] Analizando con IA...")
-            resultado = process_pdf_folder()
+            self.log(f"✅ {resultado.get('total_pdfs', 0)} documentos creados y analizados")
             
             total_opps = resultado.get('total_opportunities', 0)
             
@@ -1092,7 +1136,7 @@ https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/home"""
             
             # Resumen
             summary = f"""📅 Fecha: {data.get('processing_date', 'N/A')[:10]}
-📄 PDFs: {data.get('total_pdfs', 0)}
+📄 Documentos: {data.get('total_pdfs', 0)}
 💰 Oportunidades: {data.get('total_opportunities', 0)}
 🌍 Idioma: {data.get('language', 'ES')}
 
@@ -1,10 +1,10 @@
 import sys
-import time
 from pathlib import Path
-from typing import List, Optional
+from typing import List
 
 # Si no se pasan argumentos de línea de comandos, abrir GUI
-if len(sys.argv) == 1:
+# (solo en el proceso principal: los procesos de exportación re-importan este módulo)
+if len(sys.argv) == 1 and __name__ == "__main__":
     from gui_app import main as gui_main
     gui_main()
     sys.exit()
@@ -15,7 +15,9 @@ if len(sys.argv) == 1:
 sys.path.append(str(Path(__file__).parent / "scripts"))
 
 from webpage_print_to_pdf import export_urls
-from funding_pdf_extractor import process_pdf_folder
+from funding_pdf_extractor import process_pdf_folder, list_documents
+from pipeline import run_pipeline
+from listing_crawler import crawl_and_export
 from config import *
 
 def print_banner():
@@ -31,14 +33,15 @@ def menu_principal():
     """Menú interactivo principal"""
     print("\n🎯 MENÚ PRINCIPAL")
     print("="*50)
-    print("1. Exportar URLs a PDF")
-    print("2. Procesar PDFs existentes")
+    print("1. Exportar URLs (PDF o HTML)")
+    print("2. Procesar documentos existentes")
     print("3. Pipeline completo (URLs → PDFs → Análisis)")
-    print("4. Configuración")
-    print("5. Salir")
+    print("4. Rastrear fuentes de convocatorias y exportar")
+    print("5. Configuración")
+    print("6. Salir")
     print("="*50)
     
-    return input("\nSelecciona una opción (1-5): ").strip()
+    return input("\nSelecciona una opción (1-6): ").strip()
 
 def obtener_urls() -> List[str]:
     """Obtiene URLs del usuario"""
@@ -67,7 +70,7 @@ def ejecutar_exportacion_urls():
         print("\n❌ No se ingresaron URLs válidas")
         return
     
-    print(f"\n🚀 Exportando {len(urls)} URLs a PDF...")
+    print(f"\n🚀 Exportando {len(urls)} URLs...")
     print(f"📁 Carpeta de destino: {PDFS_SALIDA}\n")
     
     resultados = export_urls(urls)
@@ -83,17 +86,17 @@ def ejecutar_exportacion_urls():
             print(f"❌ Error en {r['url'][:30]}...: {r['message'][:50]}")
 
 def ejecutar_procesamiento_pdfs():
-    """Ejecuta módulo de procesamiento de PDFs"""
-    # Verificar PDFs disponibles
-    pdfs = list(PDFS_SALIDA.glob("*.pdf"))
+    """Ejecuta módulo de procesamiento de documentos"""
+    # Verificar documentos disponibles
+    pdfs = list_documents(PDFS_SALIDA)
     
     if not pdfs:
-        print(f"\n❌ No hay PDFs en {PDFS_SALIDA}")
+        print(f"\n❌ No hay documentos en {PDFS_SALIDA}")
         print("   Primero debes exportar algunas URLs o colocar PDFs en la carpeta")
         return
     
-    print(f"\n📚 Encontrados {len(pdfs)} PDFs para procesar")
-    print("PDFs a analizar:")
+    print(f"\n📚 Encontrados {len(pdfs)} documentos para procesar")
+    print("Documentos a analizar:")
     for i, pdf in enumerate(pdfs[:10], 1):  # Mostrar máximo 10
         print(f"   {i}. {pdf.name}")
     if len(pdfs) > 10:
@@ -128,27 +131,34 @@ def pipeline_completo():
         print("\n❌ Pipeline cancelado: no se ingresaron URLs")
         return
     
-    # Paso 2: Exportar a PDF
-    print(f"\n[1/2] Exportando {len(urls)} URLs a PDF...")
-    resultados_export = export_urls(urls)
+    # Pasos 2 y 3 solapados: cada documento se analiza en cuanto se exporta
+    print(f"\n🔄 Exportando {len(urls)} URLs y analizando cada documento al terminar...")
+    resultado = run_pipeline(urls)
     
-    exitosos = sum(1 for r in resultados_export if r['status'] == 'success')
-    if exitosos == 0:
-        print("\n❌ Pipeline cancelado: no se pudo exportar ningún PDF")
+    if resultado.get('error'):
+        print("\n❌ Pipeline cancelado: no se pudo exportar ningún documento")
         return
     
-    print(f"✅ {exitosos} PDFs creados exitosamente")
-    
-    # Pequeña pausa
-    time.sleep(2)
-    
-    # Paso 3: Procesar PDFs
-    print(f"\n[2/2] Analizando PDFs con IA...")
-    resultado = process_pdf_folder()
+    print(f"✅ {resultado.get('total_pdfs', 0)} documentos creados y analizados")
     
     print("\n🎉 ¡PIPELINE COMPLETADO!")
     print(f"📊 Total de oportunidades encontradas: {resultado.get('total_opportunities', 0)}")
 
+def ejecutar_rastreo():
+    """Rastrea las fuentes de listados configuradas y exporta lo encontrado"""
+    print("\n🔎 RASTREO DE FUENTES")
+    print("="*50)
+    
+    resultados = crawl_and_export()
+    
+    if not resultados:
+        print("\nℹ️ No se encontraron URLs nuevas para exportar")
+        return
+    
+    exitosos = sum(1 for r in resultados if r['status'] == 'success')
+    print(f"\n✅ Exportados: {exitosos}/{len(resultados)}")
+    print(f"📁 Carpeta de destino: {PDFS_SALIDA}")
+
 def mostrar_configuracion():
     """Muestra la configuración actual"""
     print("\n⚙️ CONFIGURACIÓN ACTUAL")
@@ -187,14 +197,16 @@ def main():
         elif opcion == '3':
             pipeline_completo()
         elif opcion == '4':
-            mostrar_configuracion()
+            ejecutar_rastreo()
         elif opcion == '5':
+            mostrar_configuracion()
+        elif opcion == '6':
             print("\n👋 ¡Hasta luego!")
             break
         else:
             print("\n❌ Opción no válida")
         
-        if opcion in ['1', '2', '3']:
+        if opcion in ['1', '2', '3', '4']:
             input("\nPresiona Enter para volver al menú...")
 
 if __name__ == "__main__":
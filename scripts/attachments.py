@@ -0,0 +1,105 @@
+# scripts/attachments.py
+"""
+Descarga de anexos enlazados en las convocatorias (TdR, bases, formularios)
+Se guardan junto al PDF de la página para analizarlos como un solo paquete
+"""
+
+import re
+import asyncio
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, unquote
+
+from http_fetch import download_file
+from sidecar import attachment_path, find_attachments
+
+# Extensiones de anexo que el extractor sabe leer y su firma de archivo
+ATTACHMENT_TYPES = {
+    ".pdf": b"%PDF",
+    ".docx": b"PK"
+}
+
+# Enlaces de descarga sin extensión en la ruta (p. ej. ?format=pdf)
+_QUERY_TYPE = re.compile(r"[?&](format|type|ext)=(pdf|docx)\b", re.IGNORECASE)
+
+def attachment_type(href: str) -> Optional[str]:
+    """Extensión del anexo (.pdf, .docx) o None si el enlace no es un anexo"""
+    parsed = urlparse(href)
+    suffix = PurePosixPath(unquote(parsed.path)).suffix.lower()
+    if suffix in ATTACHMENT_TYPES:
+        return suffix
+    match = _QUERY_TYPE.search(parsed.query)
+    if match:
+        return "." + match.group(2).lower()
+    return None
+
+def find_attachment_links(links: List[Dict], page_url: str, max_files: int) -> List[Dict]:
+    """Enlaces a anexos de una página, sin duplicados ni la propia página"""
+    found: Dict[str, Dict] = {}
+    for link in links:
+        href = link.get("href", "").split("#")[0]
+        kind = attachment_type(href)
+        if kind and href != page_url and href not in found:
+            found[href] = {"url": href, "text": link.get("text", ""), "type": kind}
+    return list(found.values())[:max_files]
+
+def _safe_name(link: Dict) -> str:
+    name = PurePosixPath(unquote(urlparse(link["url"]).path)).stem or link["text"] or "anexo"
+    name = re.sub(r'[^\w\-]+', '_', name, flags=re.UNICODE).strip('_')[:60] or "anexo"
+    return name + link["type"]
+
+class AttachmentHarvester:
+    """
+    Descarga los anexos de las páginas exportadas
+
+    El límite por host es compartido por todas las páginas de la sesión, así
+    varias convocatorias del mismo portal no saturan su servidor de archivos.
+    """
+
+    def __init__(self, client, per_host: int = 2, max_bytes: int = 20 * 1024 * 1024,
+                 max_files: int = 8):
+        self.client = client
+        self.per_host = max(1, per_host)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def _download(self, doc_path: Path, number: int, link: Dict, index: int) -> Optional[Dict]:
+        host = urlparse(link["url"]).hostname or ""
+        limit = self.host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        dest = attachment_path(doc_path, number, _safe_name(link))
+        async with limit:
+            try:
+                download = await download_file(
+                    self.client, link["url"], dest,
+                    max_bytes=self.max_bytes,
+                    expected_magic=ATTACHMENT_TYPES[link["type"]]
+                )
+            except Exception as e:
+                print(f"   [{index}] ⚠️ Anexo omitido {link['url'][:70]}: {str(e)[:80]}")
+                return None
+        return {
+            "url": link["url"],
+            "text": link["text"],
+            "filename": dest.name,
+            "bytes": download["bytes"]
+        }
+
+    async def harvest(self, doc_path: Path, links: List[Dict], page_url: str, index: int = 0) -> List[Dict]:
+        """Descarga a la vez los anexos enlazados y devuelve los guardados"""
+        # Los anexos de una exportación anterior del mismo documento se reemplazan
+        for old in find_attachments(doc_path):
+            old.unlink(missing_ok=True)
+        candidates = find_attachment_links(links, page_url, self.max_files)
+        if not candidates:
+            return []
+        print(f"   [{index}] 📎 Descargando {len(candidates)} anexos...")
+        downloads = await asyncio.gather(*(
+            self._download(doc_path, number, link, index)
+            for number, link in enumerate(candidates, 1)
+        ))
+        saved = [d for d in downloads if d]
+        if saved:
+            total_kb = sum(d["bytes"] for d in saved) // 1024
+            print(f"   [{index}] 📎 {len(saved)} anexos guardados ({total_kb} KB)")
+        return saved
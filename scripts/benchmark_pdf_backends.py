@@ -0,0 +1,109 @@
+# scripts/benchmark_pdf_backends.py
+"""
+Compara los motores de extracción de PDF sobre la misma carpeta
+Mide velocidad (páginas/s) y concordancia del texto con pdfminer, que es la
+referencia, para decidir qué poner en PDF_TEXT_BACKEND
+
+Uso: python scripts/benchmark_pdf_backends.py [carpeta] [máx. archivos]
+"""
+
+import re
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+from pdf_backends import PDF_BACKENDS, DEFAULT_PDF_BACKEND
+from export_metrics import count_pdf_pages
+from sidecar import is_attachment
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+def word_agreement(reference: str, text: str) -> float:
+    """
+    Palabras en común entre dos textos (0-1), sin tener en cuenta el orden:
+    los motores ordenan distinto columnas y tablas, pero deben sacar las
+    mismas palabras
+    """
+    ref_words = Counter(w.lower() for w in _WORD.findall(reference))
+    words = Counter(w.lower() for w in _WORD.findall(text))
+    total = max(sum(ref_words.values()), sum(words.values()))
+    if not total:
+        return 1.0
+    return sum((ref_words & words).values()) / total
+
+def benchmark(pdf_files: List[Path]) -> Dict:
+    """Extrae cada PDF con cada motor disponible y resume los resultados"""
+    backends = [b for b in PDF_BACKENDS.values() if b.available()]
+    missing = [name for name, b in PDF_BACKENDS.items() if not b.available()]
+    if missing:
+        print(f"ℹ️ Motores no instalados: {', '.join(missing)}")
+
+    pages = {path: count_pdf_pages(path) or 0 for path in pdf_files}
+    texts: Dict[str, Dict[Path, str]] = {}
+    summary = {}
+    for backend in backends:
+        print(f"\n⚙️ {backend.name} {backend.version()}")
+        texts[backend.name] = {}
+        elapsed = 0.0
+        failures = 0
+        for path in pdf_files:
+            started = time.perf_counter()
+            text = backend.extract(path)
+            elapsed += time.perf_counter() - started
+            if text is None:
+                failures += 1
+            texts[backend.name][path] = text or ""
+        total_pages = sum(pages.values())
+        summary[backend.name] = {
+            "version": backend.version(),
+            "seconds": round(elapsed, 2),
+            "pages_per_second": round(total_pages / elapsed, 1) if elapsed else None,
+            "chars": sum(len(t) for t in texts[backend.name].values()),
+            "failures": failures
+        }
+        print(f"   {elapsed:.1f}s, {summary[backend.name]['pages_per_second']} páginas/s")
+
+    reference = texts[DEFAULT_PDF_BACKEND]
+    for name, backend_texts in texts.items():
+        scores = [word_agreement(reference[path], backend_texts[path]) for path in pdf_files]
+        summary[name]["agreement_mean"] = round(sum(scores) / len(scores), 3)
+        summary[name]["agreement_min"] = round(min(scores), 3)
+        worst = min(zip(scores, pdf_files), key=lambda item: item[0])
+        summary[name]["worst_file"] = worst[1].name
+    return {"files": len(pdf_files), "pages": sum(pages.values()), "backends": summary}
+
+def print_report(report: Dict):
+    reference_time = report["backends"][DEFAULT_PDF_BACKEND]["seconds"]
+    print(f"\n{'='*78}")
+    print(f"📊 {report['files']} PDFs, {report['pages']} páginas (referencia: {DEFAULT_PDF_BACKEND})")
+    print(f"{'='*78}")
+    print(f"{'Motor':<10} {'Tiempo':>8} {'Pág/s':>8} {'Veces':>6} {'Concord.':>9} {'Mín.':>6}  Peor archivo")
+    for name, row in report["backends"].items():
+        speedup = reference_time / row["seconds"] if row["seconds"] else 0
+        print(f"{name:<10} {row['seconds']:>7.1f}s {row['pages_per_second'] or 0:>8} {speedup:>5.1f}x "
+              f"{row['agreement_mean']:>9.1%} {row['agreement_min']:>6.0%}  {row['worst_file'][:30]}")
+
+def main():
+    import config
+    folder = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(config.PDFS_SALIDA)
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    pdf_files = sorted(f for f in folder.glob("*.pdf") if not is_attachment(f))[:limit]
+    if not pdf_files:
+        print(f"❌ No se encontraron PDFs en {folder}")
+        return
+
+    print(f"📁 Comparando motores sobre {len(pdf_files)} PDFs de {folder}")
+    report = benchmark(pdf_files)
+    print_report(report)
+
+    output = Path(config.RESULTADOS) / f"benchmark_pdf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\n💾 Informe guardado en {output}")
+
+if __name__ == "__main__":
+    main()
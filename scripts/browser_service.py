@@ -0,0 +1,234 @@
+# scripts/browser_service.py
+"""
+Servicio de navegador persistente para el exportador
+Mantiene un Chromium caliente en un hilo propio entre trabajos de exportación
+"""
+
+import asyncio
+import atexit
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+from playwright.async_api import async_playwright
+
+# Argumentos de arranque de Chromium (anti-detección)
+BROWSER_LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage'
+]
+
+# Segundos entre comprobaciones de salud del navegador
+HEALTH_CHECK_INTERVAL = 30
+
+async def launch_browser(playwright, headless: bool = False):
+    """
+    Lanza Chromium con la configuración anti-detección del exportador
+    """
+    return await playwright.chromium.launch(
+        headless=headless,
+        args=BROWSER_LAUNCH_ARGS
+    )
+
+_DONE = object()
+
+class _JobError:
+    """Excepción de un trabajo en streaming, para relanzarla en el hilo consumidor"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+async def _pump(iterator: AsyncIterator, items: queue.Queue):
+    """Pasa los elementos de un iterador async a una cola entre hilos"""
+    try:
+        async for item in iterator:
+            items.put(item)
+    except Exception as e:
+        items.put(_JobError(e))
+    finally:
+        items.put(_DONE)
+
+def _drain(items: queue.Queue, on_close: Callable[[], None]) -> Iterator:
+    """Entrega en el hilo actual lo que _pump va dejando en la cola"""
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _JobError):
+                raise item.error
+            yield item
+    finally:
+        on_close()
+
+def iterate_in_thread(make_iterator: Callable[[], AsyncIterator]) -> Iterator:
+    """
+    Consume un iterador async desde código síncrono con un event loop
+    propio en un hilo aparte (para usar sin el servicio)
+    """
+    items = queue.Queue()
+    thread = threading.Thread(
+        target=lambda: asyncio.run(_pump(make_iterator(), items)),
+        daemon=True
+    )
+    thread.start()
+    return _drain(items, lambda: None)
+
+class BrowserService:
+    """
+    Navegador de larga duración compartido entre llamadas a export_urls
+
+    Corre un event loop en un hilo daemon que es dueño de Playwright y del
+    navegador. Los trabajos se envían desde cualquier hilo con run() y reciben
+    el navegador ya lanzado. Si Chromium se cae, se relanza en la siguiente
+    comprobación de salud o antes del siguiente trabajo.
+    """
+
+    def __init__(self, headless: bool = False):
+        self.headless = headless
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._browser_headless = headless
+        self._health_task = None
+        self.restarts = 0
+
+    def start(self):
+        """Arranca el hilo del servicio si no está corriendo"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(
+                target=self._run_loop,
+                name="browser-service",
+                daemon=True
+            )
+            self._thread.start()
+            self._ready.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._browser_lock = asyncio.Lock()
+        self._health_task = self._loop.create_task(self._health_loop())
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            if self._browser is not None and not self.is_healthy():
+                print("⚠️ Navegador caído, reiniciando...")
+                try:
+                    await self.get_browser()
+                except Exception as e:
+                    print(f"❌ No se pudo reiniciar el navegador: {e}")
+
+    def is_healthy(self) -> bool:
+        """Indica si el navegador está lanzado y conectado"""
+        return self._browser is not None and self._browser.is_connected()
+
+    async def get_browser(self):
+        """Devuelve el navegador activo, relanzándolo si hace falta"""
+        async with self._browser_lock:
+            if self.is_healthy() and self._browser_headless == self.headless:
+                return self._browser
+
+            if self._browser is not None:
+                self.restarts += 1
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            print("🌐 Iniciando navegador persistente...")
+            self._browser = await launch_browser(self._playwright, self.headless)
+            self._browser_headless = self.headless
+            return self._browser
+
+    async def _execute(self, job: Callable[[Any], Awaitable[Any]]):
+        browser = await self.get_browser()
+        return await job(browser)
+
+    def run(self, job: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None):
+        """
+        Ejecuta job(browser) en el hilo del servicio y espera el resultado
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._execute(job), self._loop)
+        return future.result(timeout)
+
+    def iterate(self, job: Callable[[Any], AsyncIterator]) -> Iterator:
+        """
+        Ejecuta job(browser), un iterador async, en el hilo del servicio
+        y entrega cada elemento en el hilo que llama en cuanto está listo
+        """
+        self.start()
+        items = queue.Queue()
+
+        async def stream():
+            try:
+                browser = await self.get_browser()
+            except Exception as e:
+                items.put(_JobError(e))
+                items.put(_DONE)
+                return
+            await _pump(job(browser), items)
+
+        future = asyncio.run_coroutine_threadsafe(stream(), self._loop)
+        # Si el consumidor abandona el iterador, se cancela el trabajo
+        return _drain(items, future.cancel)
+
+    async def _close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def shutdown(self, timeout: float = 10):
+        """Cierra el navegador y detiene el hilo del servicio"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(timeout)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+_service: Optional[BrowserService] = None
+_service_lock = threading.Lock()
+
+def get_browser_service(headless: bool = False) -> BrowserService:
+    """
+    Devuelve el servicio de navegador compartido del proceso
+    Si cambia el modo headless, el navegador se relanza en el siguiente trabajo
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BrowserService(headless=headless)
+            atexit.register(_service.shutdown)
+        _service.headless = headless
+        return _service
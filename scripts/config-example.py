@@ -17,6 +17,9 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-...')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
 OPENAI_TEMPERATURE = float(os.getenv('OPENAI_TEMPERATURE', '0.3'))
+# Endpoint compatible con OpenAI (vacío = api.openai.com); para pruebas:
+# python scripts/mock_openai_server.py y OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
 
 # Rutas del proyecto
 BASE_DIR = Path(_file_).parent.parent.resolve()  #  .resolve() para path absoluto
@@ -108,6 +111,7 @@ def get_folder_path(key, default_name):
 PDFS_ENTRADA = get_folder_path('pdfs_entrada', 'pdfs_entrada')
 PDFS_SALIDA = get_folder_path('pdfs_salida', 'pdfs_salida')
 RESULTADOS = get_folder_path('resultados', 'resultados')
+CACHE_DIR = get_folder_path('cache', '.cache')  # Memoria del exportador (cookies, perfiles...)
 
 # ⭐ CREAR CARPETAS DE FORMA SEGURA
 def create_folder_safe(folder_path):
@@ -127,7 +131,8 @@ def create_folder_safe(folder_path):
 for folder_name, folder_path in [
     ("PDFs Entrada", PDFS_ENTRADA),
     ("PDFs Salida", PDFS_SALIDA),
-    ("Resultados", RESULTADOS)
+    ("Resultados", RESULTADOS),
+    ("Caché", CACHE_DIR)
 ]:
     if not folder_path.exists():
         print(f"📁 Creando carpeta: {folder_path}")
@@ -146,6 +151,79 @@ PDF_CONFIG = {
     "timeout": 30000
 }
 
+# Configuración del exportador (concurrencia y cortesía por dominio)
+EXPORT_CONFIG = {
+    "max_concurrent_pages": int(os.getenv('EXPORT_MAX_PAGES', '4')),   # Páginas renderizando a la vez
+    "per_domain_concurrency": int(os.getenv('EXPORT_PER_DOMAIN', '1')), # Páginas a la vez por dominio
+    "per_domain_delay": (3, 7),                                         # Pausa (s) entre visitas al mismo dominio
+    "use_browser_service": True,                                        # Mantener Chromium abierto entre exportaciones
+    "headless": os.getenv('EXPORT_HEADLESS', 'True').lower() == 'true', # False = ventana visible (más lento)
+    # Tipos de recurso que no se descargan (image, font, media, stylesheet, script...)
+    "block_resources": ["media", "websocket", "eventsource", "manifest", "texttrack"],
+    "block_trackers": True,                                             # Bloquear analítica y publicidad
+    "reuse_unchanged": True,                                            # Reutilizar PDFs de páginas sin cambios
+    "write_text_sidecar": True,                                         # Guardar texto del DOM junto al PDF
+    "learn_domain_timings": True,                                       # Ajustar esperas con lo observado por dominio
+    "workers": int(os.getenv('EXPORT_WORKERS', '1')),                   # Procesos con navegador propio (1 = sin repartir)
+    "worker_restarts": 2,                                               # Reintentos de un proceso caído
+    "retry_attempts": int(os.getenv('EXPORT_RETRIES', '3')),            # Intentos por URL (timeout, anti-bot, 5xx, crash)
+    "retry_base_delay": 5,                                              # Backoff inicial (s), se duplica en cada intento
+    "retry_max_delay": 60,                                              # Backoff máximo por intento (s)
+    "retry_budget": 300,                                                # Suma máxima de esperas de reintento por lote (s)
+    "context_max_pages": int(os.getenv('EXPORT_CONTEXT_PAGES', '50')),  # Páginas antes de reciclar el contexto del navegador
+    "context_max_rss_mb": int(os.getenv('EXPORT_MAX_RSS_MB', '2048')),  # Reciclar antes si la memoria supera estos MB de Chromium
+    "persist_storage": True,                                            # Reutilizar cookies/localStorage por dominio (consentimientos)
+    "browser_profile": os.getenv('EXPORT_BROWSER_PROFILE', 'False').lower() == 'true',  # Perfil de Chromium en disco (caché HTTP, service workers)
+    "static_fetch": os.getenv('EXPORT_STATIC_FETCH', 'True').lower() == 'true',  # Guardar como HTML las páginas que no necesitan JavaScript
+    "static_min_text": 1500,                                            # Caracteres de texto para considerar útil el HTML sin navegador
+    "scroll_max_pixels": int(os.getenv('EXPORT_SCROLL_MAX_PX', '30000')),  # Tope de scroll en páginas infinitas (el PDF se recorta ahí)
+    "scroll_max_ms": 15000,                                             # Tope de tiempo de scroll por página (ms)
+    "scroll_stall_rounds": 3,                                           # Intentos al final sin que crezca la página antes de parar
+    "harvest_attachments": os.getenv('EXPORT_ATTACHMENTS', 'True').lower() == 'true',  # Descargar anexos PDF/DOCX enlazados (TdR, bases)
+    "attachment_per_host": 2,                                           # Descargas de anexos a la vez por host
+    "attachment_max_mb": 20,                                            # Tamaño máximo por anexo (MB)
+    "attachment_max_files": 8                                           # Anexos por página
+}
+
+# Pipeline completo: análisis solapado con la exportación
+PIPELINE_CONFIG = {
+    "analysis_workers": int(os.getenv('PIPELINE_WORKERS', '2')),  # Documentos analizándose a la vez (sin LLM_CONFIG["async"])
+    "queue_size": int(os.getenv('PIPELINE_QUEUE', '8'))          # PDFs exportados esperando análisis
+}
+
+# Extracción de texto en paralelo (pdfminer usa un núcleo por proceso)
+EXTRACTION_CONFIG = {
+    "workers": int(os.getenv('EXTRACTION_WORKERS', str(max(1, (os.cpu_count() or 2) - 1)))),  # Procesos de extracción
+    "file_timeout": int(os.getenv('EXTRACTION_TIMEOUT', '120')),  # Segundos máximos por documento (0 = sin límite)
+    "stream_pages": os.getenv('EXTRACTION_STREAM', 'True').lower() == 'true'  # Leer PDFs por páginas y parar al llenar los bloques
+}
+
+# Motor de extracción de texto de PDF: "pdfminer" (referencia), "pdfium"
+# (requiere pypdfium2) o "pymupdf" (requiere PyMuPDF). Compáralos con
+# scripts/benchmark_pdf_backends.py antes de cambiarlo
+PDF_TEXT_BACKEND = os.getenv('PDF_TEXT_BACKEND', 'pdfminer')
+
+# Caché del texto extraído (clave: hash del archivo + parámetros de extracción)
+TEXT_CACHE_CONFIG = {
+    "enabled": os.getenv('TEXT_CACHE', 'True').lower() == 'true',  # Reutilizar texto ya extraído
+    "compress": True                                             # Guardar el texto con gzip
+}
+
+# Páginas de listados de convocatorias que rastrea el crawler
+# Cada fuente: "url" y opcionalmente "include"/"exclude" (regex de enlaces de
+# detalle), "next" (regex de paginación), "same_host" y "max_pages"
+LISTING_SOURCES = [
+    # {"url": "https://www.ungm.org/Public/Notice", "include": [r"/Public/Notice/\d+"]},
+]
+
+CRAWLER_CONFIG = {
+    "max_concurrency": int(os.getenv('CRAWLER_CONCURRENCY', '8')),  # Listados descargándose a la vez
+    "per_host": 2,                                                # Descargas a la vez por host
+    "max_pages": 5,                                               # Páginas de paginación por fuente
+    "max_links": 500,                                             # Enlaces de detalle por fuente
+    "only_new": True                                              # Exportar solo URLs no exportadas antes
+}
+
 # Configuración de procesamiento (desde .env o valores por defecto)
 CHUNK_SIZE = int(os.getenv('CHUNK_SIZE', '6000'))
 CHUNK_OVERLAP = int(os.getenv('CHUNK_OVERLAP', '500'))
@@ -165,6 +243,17 @@ KEYWORDS = [
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 RATE_LIMIT_DELAY = int(os.getenv('RATE_LIMIT_DELAY', '1'))
 
+# Llamadas al LLM en paralelo, limitadas por los RPM/TPM de la cuenta
+# (con "async" en False se usa el análisis secuencial con RATE_LIMIT_DELAY)
+LLM_CONFIG = {
+    "async": os.getenv('LLM_ASYNC', 'True').lower() == 'true',  # Analizar varios documentos a la vez
+    "max_concurrency": int(os.getenv('LLM_CONCURRENCY', '8')),   # Llamadas en vuelo a la vez
+    "requests_per_minute": int(os.getenv('OPENAI_RPM', '500')),  # Límite de peticiones por minuto
+    "tokens_per_minute": int(os.getenv('OPENAI_TPM', '30000')),  # Límite de tokens por minuto
+    "output_tokens": 1000,                                       # Tokens de respuesta reservados por llamada
+    "timeout": 120                                               # Segundos máximos por llamada
+}
+
 def update_paths(entrada=None, salida=None, resultados=None):
     """
     Actualiza las rutas de las carpetas y las guarda
@@ -0,0 +1,158 @@
+# scripts/context_pool.py
+"""
+Ciclo de vida de contextos y páginas del navegador en lotes largos
+Las páginas se cierran siempre y el contexto se recicla tras N páginas o
+cuando la memoria supera un umbral, para que la RSS no crezca sin límite
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import psutil
+
+def _is_playwright_driver(process) -> bool:
+    try:
+        return any("playwright" in part.lower() for part in process.cmdline())
+    except psutil.Error:
+        return False
+
+def browser_rss_mb() -> float:
+    """
+    Memoria residente (MB) del navegador: los drivers de Playwright hijos de
+    este proceso y sus descendientes (Chromium). Los demás hijos, como los
+    procesos de extracción de texto, no cuentan
+    """
+    total = 0
+    for driver in filter(_is_playwright_driver, psutil.Process().children()):
+        try:
+            processes = [driver] + driver.children(recursive=True)
+        except psutil.Error:
+            continue
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+    return total / 2**20
+
+class _PooledContext:
+    def __init__(self, context, number: int):
+        self.context = context
+        self.number = number
+        self.active = 0
+        self.served = 0
+        self.retiring = False
+        self.domains: Set[str] = set()
+        self.closing = False
+        self.closed = asyncio.Event()
+
+class ContextPool:
+    """
+    Entrega páginas desde un contexto compartido y lo sustituye por uno nuevo
+    cuando ha servido max_pages páginas o la memoria supera max_rss_mb.
+    El contexto retirado se cierra cuando terminan sus últimas páginas.
+
+    create_context() crea cada contexto; on_retire(context, domains), si se
+    pasa, se llama antes de cerrarlo con los dominios que visitó. Con
+    exclusive=True (perfil persistente) el contexto nuevo espera a que el
+    anterior se haya cerrado.
+    """
+
+    def __init__(self, create_context: Callable[[], Awaitable], max_pages: int = 50,
+                 max_rss_mb: Optional[float] = None,
+                 on_retire: Callable[[object, Set[str]], Awaitable] = None,
+                 exclusive: bool = False):
+        self.create_context = create_context
+        self.on_retire = on_retire
+        self.exclusive = exclusive
+        self.max_pages = max(1, max_pages)
+        self.max_rss_mb = max_rss_mb
+        self.current: Optional[_PooledContext] = None
+        self.owners: Dict[object, _PooledContext] = {}
+        self.created = 0
+        self.peak_mb = 0.0
+        self.lock = asyncio.Lock()
+
+    async def _context(self) -> _PooledContext:
+        async with self.lock:
+            if self.current is None or self.current.retiring:
+                if self.exclusive and self.current is not None:
+                    await self.current.closed.wait()
+                self.created += 1
+                context = await self.create_context()
+                self.current = _PooledContext(context, self.created)
+            return self.current
+
+    async def open_page(self, domain: str = None):
+        pooled = await self._context()
+        if domain:
+            pooled.domains.add(domain)
+        pooled.active += 1
+        pooled.served += 1
+        if pooled.served >= self.max_pages:
+            pooled.retiring = True
+        try:
+            page = await pooled.context.new_page()
+        except Exception:
+            pooled.active -= 1
+            await self._close_if_idle(pooled)
+            raise
+        self.owners[page] = pooled
+        self.sample_memory()
+        return page
+
+    async def release(self, page):
+        """Cierra la página (aunque la exportación haya fallado)"""
+        pooled = self.owners.pop(page, None)
+        try:
+            await page.close()
+        except Exception:
+            pass
+        if pooled is None:
+            return
+        pooled.active -= 1
+        self.sample_memory()
+        await self._close_if_idle(pooled)
+
+    def sample_memory(self):
+        rss = browser_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        if self.max_rss_mb and rss > self.max_rss_mb and self.current and not self.current.retiring:
+            print(f"🧠 Chromium usa {rss:.0f} MB (> {self.max_rss_mb} MB), reciclando contexto")
+            self.current.retiring = True
+
+    async def _close_if_idle(self, pooled: _PooledContext):
+        if pooled.retiring and pooled.active <= 0 and not pooled.closing:
+            if self.current is pooled and not self.exclusive:
+                self.current = None
+            await self._close_context(pooled)
+
+    async def _close_context(self, pooled: _PooledContext):
+        pooled.closing = True
+        try:
+            if self.on_retire:
+                await self.on_retire(pooled.context, pooled.domains)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el estado del contexto: {e}")
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+        pooled.closed.set()
+
+    async def close(self):
+        contexts = {pooled.number: pooled for pooled in self.owners.values()}
+        if self.current:
+            contexts[self.current.number] = self.current
+        for pooled in contexts.values():
+            if not pooled.closing:
+                await self._close_context(pooled)
+        self.current = None
+        self.owners.clear()
+
+    def report(self) -> Dict:
+        """Resumen del lote: contextos usados y pico de memoria del navegador (MB)"""
+        return {
+            "contexts": self.created,
+            "peak_rss_mb": round(self.peak_mb) if self.peak_mb else None
+        }
@@ -0,0 +1,139 @@
+# scripts/document_text.py
+"""
+Lectura del texto de los documentos exportados (PDF, HTML, DOCX y anexos)
+Sin dependencias de OpenAI, para poder usarse desde procesos de extracción
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+from docx import Document
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+from sidecar import read_sidecar, sidecar_to_text, find_attachments
+from html_text import html_to_capture
+from text_cache import get_text_cache
+from pdf_backends import get_pdf_backend
+from text_focus import get_stream_focus, focus_pages, clean_and_structure_text
+from structured_info import extract_structured_info
+
+def read_pdf_text_enhanced(filepath: Path) -> str:
+    """
+    Texto de un PDF con el motor configurado (PDF_TEXT_BACKEND), reutilizando
+    la caché si el archivo no ha cambiado
+    """
+    backend = get_pdf_backend()
+    cache = get_text_cache()
+    if cache is None:
+        return backend.extract(filepath) or ""
+    key = cache.key(filepath, backend.params())
+    text = cache.get(key)
+    if text is not None:
+        print(f"   ⚡ Texto del PDF desde caché (sin {backend.name})")
+        return text
+    text = backend.extract(filepath)
+    if text is None:
+        # Un error de lectura no se guarda: puede ser pasajero
+        return ""
+    cache.put(key, text)
+    return text
+
+def _scan_page_text(text: str) -> Dict[str, str]:
+    return extract_structured_info(text, verbose=False)
+
+def _stream_pdf_text(backend, filepath: Path, focus: Dict) -> Optional[Dict]:
+    pages = backend.iter_pages(filepath)
+    try:
+        streamed = focus_pages(pages, focus["keywords"], focus["budget"], scan=_scan_page_text)
+    except Exception as e:
+        print(f"   ⚠️ Error en extracción: {e}")
+        return None
+    finally:
+        pages.close()
+    if streamed["stopped"]:
+        print(f"   ✂️ Bloques completos en la página {streamed['pages']}, no se lee el resto")
+    if len(streamed["text"]) > 50:
+        return {"text": streamed["text"], "info": streamed["info"]}
+    # Sin texto útil: extracción completa, con el método básico de respaldo;
+    # el análisis ya aplica la regex a todo el texto
+    text = backend.extract(filepath)
+    return {"text": clean_and_structure_text(text), "info": {}} if text is not None else None
+
+def read_pdf_text_streamed(filepath: Path, focus: Dict) -> Dict:
+    """
+    Texto de un PDF leído página a página, ya limpio y recortado a lo que
+    usarán los bloques del análisis (ver text_focus.PageFocus); deja de
+    parsear en cuanto el presupuesto de bloques está lleno
+    Devuelve {"text", "info"}: info son los datos de la regex (deadline,
+    contacto...) en todas las páginas leídas, no solo en el texto conservado
+    """
+    backend = get_pdf_backend()
+    cache = get_text_cache()
+    if cache is None:
+        return _stream_pdf_text(backend, filepath, focus) or {"text": "", "info": {}}
+    key = cache.key(filepath, {**backend.params(), "focus": focus, "format": "text+info"})
+    cached = cache.get(key)
+    if cached is not None:
+        print(f"   ⚡ Texto del PDF desde caché (sin {backend.name})")
+        return json.loads(cached)
+    streamed = _stream_pdf_text(backend, filepath, focus)
+    if streamed is None:
+        return {"text": "", "info": {}}
+    cache.put(key, json.dumps(streamed, ensure_ascii=False))
+    return streamed
+
+def read_docx_text(filepath: Path) -> str:
+    """Texto de un DOCX (párrafos y tablas)"""
+    try:
+        document = Document(str(filepath))
+    except Exception as e:
+        print(f"   ⚠️ No se pudo leer {filepath.name}: {e}")
+        return ""
+    parts = [p.text for p in document.paragraphs if p.text.strip()]
+    for table in document.tables:
+        for row in table.rows:
+            cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+            if cells:
+                parts.append(" | ".join(cells))
+    return "\n".join(parts)
+
+def read_main_document(filepath: Path, focus: Optional[Dict] = None) -> Dict:
+    """
+    Texto de un documento exportado: usa el sidecar del exportador si existe,
+    si no, extrae el texto del PDF con su motor o del HTML guardado
+    Con focus, el PDF se lee por páginas y solo hasta llenar los bloques, y
+    info trae lo que la regex encontró en esas páginas
+    """
+    sidecar = read_sidecar(filepath)
+    if sidecar:
+        text = sidecar_to_text(sidecar)
+        if len(text) > 50:
+            print("   ⚡ Usando texto capturado en la exportación (sin extraer el PDF)")
+            return {"text": text, "info": {}}
+    if filepath.suffix.lower() in ('.html', '.htm'):
+        html = filepath.read_text(encoding='utf-8', errors='replace')
+        return {"text": sidecar_to_text(html_to_capture(html, filepath.resolve().as_uri())), "info": {}}
+    if filepath.suffix.lower() == '.docx':
+        return {"text": read_docx_text(filepath), "info": {}}
+    if focus:
+        return read_pdf_text_streamed(filepath, focus)
+    return {"text": read_pdf_text_enhanced(filepath), "info": {}}
+
+def read_document(filepath: Path) -> Dict:
+    """
+    Texto del documento seguido del de sus anexos (TdR, bases...), para
+    analizar la convocatoria como un solo paquete, y los datos de regex
+    encontrados al leerlos por páginas (primero los del documento)
+    """
+    focus = get_stream_focus()
+    document = read_main_document(filepath, focus)
+    text, info = document["text"], dict(document["info"])
+    for attachment in find_attachments(filepath):
+        print(f"   📎 Incluyendo anexo {attachment.name}")
+        attachment_document = read_main_document(attachment, focus)
+        if attachment_document["text"].strip():
+            text += f"\n\n=== ANEXO: {attachment.name} ===\n{attachment_document['text']}"
+        for key, value in attachment_document["info"].items():
+            info.setdefault(key, value)
+    return {"text": text, "info": info}
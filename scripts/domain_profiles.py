@@ -0,0 +1,163 @@
+# scripts/domain_profiles.py
+"""
+Perfiles de tiempos por dominio aprendidos de exportaciones anteriores
+Sustituyen las esperas fijas por presupuestos calculados con lo observado
+"""
+
+import math
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from json_store import JsonStore
+
+# Muestras que se conservan por dominio y métrica
+MAX_SAMPLES = 50
+# Muestras necesarias antes de confiar en lo aprendido
+MIN_SAMPLES = 3
+# Límites del presupuesto de espera (ms)
+MIN_WAIT_MS = 1500
+MAX_WAIT_MS = 20000
+# Margen sobre el p95 del tiempo de estabilización
+WAIT_MARGIN = 1.3
+# Una visita que agotó el tope tardó al menos eso: se cuenta como el tope por este factor
+CAPPED_GROWTH = 1.5
+# Fracción de visitas a dominios "con navegador" en que se vuelve a probar el HTML
+STATIC_RECHECK_RATE = 0.1
+
+TIMING_KEYS = ("load_ms", "settle_ms", "render_ms")
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Percentil por rango más cercano (None si no hay valores)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+class DomainProfileStore(JsonStore):
+    """
+    Guarda por dominio los tiempos de carga, estabilización y render,
+    la tasa de fallos y si el scroll llegó a cambiar el contenido
+
+    Las muestras nuevas se acumulan aparte y se fusionan con el archivo al
+    guardar, para que varios procesos de exportación no se pisen.
+    """
+
+    def __init__(self, path: Path, seeds: Dict[str, Dict] = None):
+        super().__init__(path, "Perfiles de dominio")
+        self.seeds = seeds or {}
+        self._pending: Dict[str, List[Dict]] = {}
+
+    def seed(self, domain: str) -> Dict:
+        """Perfil inicial configurado para el dominio (o {} si no hay)"""
+        for seed_domain, seed in self.seeds.items():
+            if domain == seed_domain or domain.endswith('.' + seed_domain):
+                return seed
+        return {}
+
+    def _apply(self, profile: Dict, sample: Dict):
+        if "static_ok" in sample:
+            profile.setdefault("static_ok", []).append(bool(sample["static_ok"]))
+            profile["static_ok"] = profile["static_ok"][-MAX_SAMPLES:]
+            return
+        for key in TIMING_KEYS:
+            if sample.get(key) is not None:
+                profile.setdefault(key, []).append(int(sample[key]))
+                profile[key] = profile[key][-MAX_SAMPLES:]
+        if sample.get("settle_ms") is not None:
+            # Una marca por muestra de settle_ms (los perfiles antiguos no la tienen)
+            capped = profile.get("settle_capped", []) + [bool(sample.get("settle_capped"))]
+            size = len(profile["settle_ms"])
+            profile["settle_capped"] = [False] * (size - len(capped)) + capped[-size:]
+        if sample.get("scroll_changed") is not None:
+            profile.setdefault("scroll_changed", []).append(bool(sample["scroll_changed"]))
+            profile["scroll_changed"] = profile["scroll_changed"][-MAX_SAMPLES:]
+        profile["attempts"] = profile.get("attempts", 0) + 1
+        profile["failures"] = profile.get("failures", 0) + (0 if sample["success"] else 1)
+        profile["updated"] = datetime.now().isoformat(timespec='seconds')
+
+    def record(self, domain: str, success: bool, load_ms: int = None, settle_ms: int = None,
+               render_ms: int = None, scroll_changed: Optional[bool] = None,
+               settle_capped: bool = False):
+        """
+        Registra lo observado en una visita al dominio
+        settle_capped indica que la página no se estabilizó antes del tope
+        """
+        sample = {
+            "success": success,
+            "load_ms": load_ms,
+            "settle_ms": settle_ms,
+            "settle_capped": settle_capped,
+            "render_ms": render_ms,
+            "scroll_changed": scroll_changed
+        }
+        self._apply(self.entries.setdefault(domain, {}), sample)
+        self._pending.setdefault(domain, []).append(sample)
+        self._dirty = True
+
+    def record_static(self, domain: str, usable: bool):
+        """Registra si el HTML sin navegador traía el contenido de la página"""
+        sample = {"static_ok": usable}
+        self._apply(self.entries.setdefault(domain, {}), sample)
+        self._pending.setdefault(domain, []).append(sample)
+        self._dirty = True
+
+    def needs_browser(self, domain: str) -> bool:
+        """
+        El dominio necesita JavaScript si su HTML casi nunca trae el contenido
+        De vez en cuando se vuelve a probar el HTML por si el sitio cambió
+        """
+        samples = self.entries.get(domain, {}).get("static_ok", [])
+        if len(samples) < MIN_SAMPLES:
+            return self.seed(domain).get("needs_browser", False)
+        if sum(samples) / len(samples) >= 0.5:
+            return False
+        return random.random() >= STATIC_RECHECK_RATE
+
+    def failure_rate(self, domain: str) -> float:
+        profile = self.entries.get(domain, {})
+        attempts = profile.get("attempts", 0)
+        return profile.get("failures", 0) / attempts if attempts else 0.0
+
+    def wait_budget(self, domain: str, default_ms: int) -> int:
+        """
+        Tope de espera para que la página esté lista: p95 del tiempo de
+        estabilización observado con margen, o la semilla/valor por defecto
+        mientras no haya muestras suficientes
+        Las visitas que agotaron el tope cuentan por encima de él, así el
+        presupuesto sube hacia MAX_WAIT_MS si el dominio nunca llega a tiempo
+        """
+        profile = self.entries.get(domain, {})
+        settle = profile.get("settle_ms", [])
+        capped = profile.get("settle_capped", [])
+        capped = [False] * (len(settle) - len(capped)) + capped
+        settle = [ms * CAPPED_GROWTH if cap else ms for ms, cap in zip(settle, capped)]
+        if len(settle) < MIN_SAMPLES:
+            return self.seed(domain).get("wait_time", default_ms)
+        budget = percentile(settle, 95) * WAIT_MARGIN
+        if self.failure_rate(domain) > 0.3:
+            # Dominio inestable: dar más margen en lugar de fallar de nuevo
+            budget *= 1.5
+        return int(min(MAX_WAIT_MS, max(MIN_WAIT_MS, budget)))
+
+    def needs_scroll(self, domain: str) -> bool:
+        """
+        Hace falta scroll salvo que, con muestras suficientes, casi nunca
+        haya cambiado el contenido de la página
+        """
+        changed = self.entries.get(domain, {}).get("scroll_changed", [])
+        if len(changed) < MIN_SAMPLES:
+            return self.seed(domain).get("needs_scroll", True)
+        return sum(changed) / len(changed) >= 0.2
+
+    def merge_into(self, merged: Dict[str, Dict]):
+        """Vuelve a aplicar las muestras nuevas sobre lo que haya en disco"""
+        for domain, samples in self._pending.items():
+            profile = merged.setdefault(domain, {})
+            for sample in samples:
+                self._apply(profile, sample)
+
+    def clear_pending(self):
+        self._pending = {}
@@ -0,0 +1,89 @@
+# scripts/export_metrics.py
+"""
+Métricas de exportación por URL y por fase
+Cada resultado lleva sus tiempos por fase, bytes y páginas del PDF, y se
+añade como una línea al archivo JSONL de métricas en RESULTADOS
+"""
+
+import json
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+METRICS_FILENAME = "metricas_exportacion.jsonl"
+
+# Objetos /Type /Page de un PDF (no /Pages)
+_PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+class PhaseTimer:
+    """
+    Cronómetro por vueltas: lap(nombre) anota el tiempo desde la vuelta
+    anterior, así las fases consecutivas se miden sin anidar bloques
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases: Dict[str, int] = {}
+
+    def lap(self, phase: str) -> int:
+        now = time.perf_counter()
+        elapsed = int((now - self.last) * 1000)
+        self.phases[phase] = self.phases.get(phase, 0) + elapsed
+        self.last = now
+        return elapsed
+
+    def total_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+def count_pdf_pages(path: Path) -> Optional[int]:
+    """
+    Número de páginas del PDF contando objetos /Page; si están dentro de
+    object streams comprimidos, se recurre a pdfminer
+    """
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    pages = len(_PAGE_OBJECT.findall(data))
+    if pages:
+        return pages
+    try:
+        from pdfminer.pdfpage import PDFPage
+        with open(path, 'rb') as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+    except Exception:
+        return None
+
+def file_metrics(filepath: Optional[str]) -> Dict:
+    """Bytes y páginas del PDF resultante"""
+    if not filepath:
+        return {"bytes": None, "pdf_pages": None}
+    path = Path(filepath)
+    if not path.exists():
+        return {"bytes": None, "pdf_pages": None}
+    pages = count_pdf_pages(path) if path.suffix.lower() == '.pdf' else None
+    return {"bytes": path.stat().st_size, "pdf_pages": pages}
+
+class MetricsLog:
+    """Añade una línea JSON por resultado al archivo de métricas"""
+
+    FIELDS = ("index", "url", "domain", "status", "cache", "render", "error_type",
+              "attempts", "total_ms", "timings", "bytes", "pdf_pages", "scroll")
+
+    def __init__(self, folder: Path, batch: str = None):
+        self.path = Path(folder) / METRICS_FILENAME
+        self.batch = batch or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def write(self, result: Dict):
+        record = {"batch": self.batch, "time": datetime.now().isoformat(timespec='seconds')}
+        record.update({key: result.get(key) for key in self.FIELDS})
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Una sola escritura en modo append por línea: segura entre procesos
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar las métricas: {e}")
@@ -0,0 +1,119 @@
+# scripts/export_retry.py
+"""
+Clasificación de fallos de exportación y planificador de reintentos
+Los reintentos esperan a que terminen las URLs nuevas del lote y usan
+backoff exponencial con jitter dentro de un presupuesto total de espera
+"""
+
+import asyncio
+import random
+from typing import Optional
+
+# Tipos de fallo
+TIMEOUT = "timeout"
+ANTI_BOT = "anti_bot"
+DNS = "dns"
+HTTP_5XX = "http_5xx"
+RENDER_CRASH = "render_crash"
+OTHER = "other"
+
+FAILURE_MESSAGES = {
+    TIMEOUT: "Timeout - El sitio tardó demasiado",
+    ANTI_BOT: "Acceso denegado - Protección anti-bot",
+    DNS: "Dominio no encontrado (DNS)",
+    HTTP_5XX: "Error del servidor (5xx)",
+    RENDER_CRASH: "El navegador falló al renderizar la página"
+}
+
+# Fallos que suelen ser transitorios y merecen otro intento
+RETRYABLE = {TIMEOUT, ANTI_BOT, HTTP_5XX, RENDER_CRASH}
+
+# Fragmentos de mensajes de error por tipo de fallo
+_PATTERNS = [
+    (DNS, ("err_name_not_resolved", "getaddrinfo", "name or service not known",
+           "nodename nor servname", "no address associated")),
+    (RENDER_CRASH, ("target crashed", "page crashed", "target closed",
+                    "browser has been closed", "target page, context or browser has been closed")),
+    (ANTI_BOT, ("access denied", "err_blocked_by_client", "captcha", "403 forbidden",
+                "429 too many requests")),
+    (TIMEOUT, ("timeout", "timed out", "err_timed_out", "err_connection_timed_out")),
+    (HTTP_5XX, ("502 bad gateway", "503 service", "504 gateway", "500 internal server error")),
+]
+
+class ExportError(Exception):
+    """Error de exportación ya clasificado (p. ej. respuesta HTTP 5xx)"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+def classify_failure(error: Exception) -> str:
+    """Clasifica una excepción en uno de los tipos de fallo"""
+    if isinstance(error, ExportError):
+        return error.kind
+    if isinstance(error, asyncio.TimeoutError):
+        return TIMEOUT
+    message = f"{type(error).__name__} {error}".lower()
+    for kind, fragments in _PATTERNS:
+        if any(fragment in message for fragment in fragments):
+            return kind
+    return OTHER
+
+def classify_status(status: int) -> Optional[str]:
+    """Tipo de fallo para un código HTTP (None si la respuesta es utilizable)"""
+    if status >= 500:
+        return HTTP_5XX
+    if status in (403, 429):
+        return ANTI_BOT
+    return None
+
+class RetryScheduler:
+    """
+    Decide qué fallos se reintentan y cuándo
+
+    Cada reintento espera a que el lote haya intentado todas sus URLs nuevas
+    (fresh_done) y luego un backoff exponencial con jitter. La suma de esperas
+    no puede superar budget segundos, para que el lote termine en tiempo acotado.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 5,
+                 max_delay: float = 60, budget: float = 300):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.spent = 0.0
+        self.pending_fresh = 0
+        self.fresh_done = asyncio.Event()
+
+    def add_fresh(self, count: int):
+        self.pending_fresh += count
+        if self.pending_fresh <= 0:
+            self.fresh_done.set()
+
+    def fresh_attempted(self):
+        """Marca que una URL nueva terminó su primer intento"""
+        self.pending_fresh -= 1
+        if self.pending_fresh <= 0:
+            self.fresh_done.set()
+
+    def next_delay(self, kind: str, attempt: int) -> Optional[float]:
+        """
+        Espera antes del siguiente intento, o None si no se reintenta
+        """
+        if kind not in RETRYABLE or attempt >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if kind == ANTI_BOT:
+            # Las protecciones anti-bot necesitan más calma
+            delay = min(self.max_delay, delay * 2)
+        delay *= random.uniform(0.5, 1.5)
+        if self.spent + delay > self.budget:
+            return None
+        self.spent += delay
+        return delay
+
+    async def wait_turn(self, delay: float):
+        """Espera al final del lote y luego el backoff"""
+        await self.fresh_done.wait()
+        await asyncio.sleep(delay)
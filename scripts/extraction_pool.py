@@ -0,0 +1,244 @@
+# scripts/extraction_pool.py
+"""
+Extracción de texto en paralelo con un pool de procesos
+pdfminer es Python puro y usa un solo núcleo; aquí cada documento se lee en
+un proceso aparte, con tiempo máximo por archivo, antes del análisis con LLM
+"""
+
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+# Valores por defecto si config.py no define EXTRACTION_CONFIG
+DEFAULT_EXTRACTION_CONFIG = {
+    "workers": max(1, (os.cpu_count() or 2) - 1),
+    "file_timeout": 120,
+    "stream_pages": True
+}
+
+# Segundos entre comprobaciones de las tareas en curso
+POLL_INTERVAL = 0.05
+
+_DONE = object()
+
+def get_extraction_config() -> Dict:
+    """Configuración de la extracción en paralelo desde config.py"""
+    import config
+    import importlib
+    importlib.reload(config)
+    extraction_config = dict(DEFAULT_EXTRACTION_CONFIG)
+    extraction_config.update(getattr(config, "EXTRACTION_CONFIG", {}))
+    return extraction_config
+
+def _extract(path: str) -> Dict:
+    """Tarea de cada proceso: texto del documento y sus anexos, con la info regex"""
+    from document_text import read_document
+    return read_document(Path(path))
+
+def _drive_pool(source: queue.Queue, workers: int, timeout: float,
+                publish: Callable[[object], None], stop: threading.Event):
+    """
+    Reparte en el pool los documentos (posición, ruta) que llegan por source
+    hasta recibir _DONE, y publica (posición, ruta, documento) al terminar
+    cada uno. Solo hay en curso tantas tareas como procesos, así el tiempo
+    desde el envío es el tiempo real de extracción. Si una tarea supera
+    timeout se termina el pool (la única forma de parar un proceso colgado),
+    se crea otro y se reenvían las tareas que estaban en curso.
+    """
+    mp = multiprocessing.get_context("spawn")
+    pending = deque()
+    running: Dict[int, Tuple[Path, object, float]] = {}
+    closed = False
+    pool = None
+    try:
+        while not stop.is_set():
+            # Recoger lo enviado; sin nada en curso, esperar al siguiente envío
+            while not closed:
+                try:
+                    item = source.get(block=not (pending or running), timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    closed = True
+                else:
+                    pending.append(item)
+            if not (pending or running):
+                if closed:
+                    break
+                continue
+
+            if pool is None:
+                pool = mp.Pool(workers)
+            while pending and len(running) < workers:
+                index, path = pending.popleft()
+                running[index] = (path, pool.apply_async(_extract, (str(path),)), time.monotonic())
+
+            finished = [index for index, (_, task, _) in running.items() if task.ready()]
+            for index in finished:
+                path, task, _ = running.pop(index)
+                try:
+                    document = task.get()
+                except Exception as e:
+                    print(f"   ⚠️ Error extrayendo {path.name}: {e}")
+                    document = {"text": "", "info": {}}
+                publish((index, path, document))
+            if finished:
+                continue
+
+            now = time.monotonic()
+            expired = [index for index, (_, _, started) in running.items() if now - started > timeout]
+            if not expired:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            for index in expired:
+                path, _, _ = running.pop(index)
+                print(f"   ⏱️ {path.name} superó {timeout:.0f}s de extracción, se omite")
+                publish((index, path, {"text": "", "info": {}}))
+            # Las demás tareas en curso mueren con el pool: volver a encolarlas
+            for index, (path, _, _) in sorted(running.items(), reverse=True):
+                pending.appendleft((index, path))
+            running.clear()
+            pool.terminate()
+            pool.join()
+            pool = None
+    except Exception as e:
+        publish(e)
+    finally:
+        if pool is not None:
+            if stop.is_set():
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+        publish(_DONE)
+
+class ExtractionPool:
+    """
+    Pool de extracción al que se envían documentos sueltos a medida que
+    aparecen (p. ej. desde el pipeline, según se exportan), con el mismo
+    tiempo máximo por archivo que iter_extracted_texts
+    submit() devuelve un Future con el documento de read_document; si el
+    archivo supera el tiempo máximo, el documento llega vacío
+    """
+
+    def __init__(self, workers: int = None, timeout: float = None):
+        extraction_config = get_extraction_config()
+        if workers is None:
+            workers = extraction_config["workers"]
+        if timeout is None:
+            timeout = extraction_config["file_timeout"]
+        self.workers = max(1, workers)
+        self.timeout = timeout or float("inf")
+        self._source: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._driver = threading.Thread(
+            target=_drive_pool,
+            args=(self._source, self.workers, self.timeout, self._publish, self._stop),
+            name="extraccion-texto",
+            daemon=True
+        )
+        self._driver.start()
+
+    def _publish(self, item):
+        with self._lock:
+            if isinstance(item, tuple):
+                index, _, document = item
+                self._futures.pop(index).set_result(document)
+                return
+            # Fin del driver (o error): no dejar a nadie esperando
+            futures, self._futures = self._futures, {}
+        for future in futures.values():
+            if isinstance(item, Exception):
+                future.set_exception(item)
+            else:
+                future.set_result({"text": "", "info": {}})
+
+    def submit(self, path: Path) -> Future:
+        future: Future = Future()
+        with self._lock:
+            index = self._submitted
+            self._submitted += 1
+            self._futures[index] = future
+        self._source.put((index, path))
+        return future
+
+    def close(self, cancel: bool = False):
+        """Termina al acabar lo enviado (o enseguida con cancel)"""
+        if cancel:
+            self._stop.set()
+        self._source.put(_DONE)
+        self._driver.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(cancel=exc_type is not None)
+
+def iter_extracted_texts(paths: List[Path], workers: int = None,
+                         timeout: float = None) -> Iterator[Tuple[int, Path, Dict]]:
+    """
+    Extrae el texto de los documentos en paralelo y entrega (posición, ruta,
+    documento) en orden de finalización, con documento como lo devuelve
+    document_text.read_document ({"text", "info"}). La extracción sigue
+    avanzando mientras el consumidor analiza el documento anterior.
+    Con file_timeout siempre se usa el pool, aunque sea un solo documento o
+    un solo proceso, porque es la única forma de cortar un PDF que se cuelga;
+    sin tiempo máximo, un solo proceso o documento se extrae aquí mismo.
+    """
+    extraction_config = get_extraction_config()
+    if workers is None:
+        workers = extraction_config["workers"]
+    if timeout is None:
+        timeout = extraction_config["file_timeout"]
+
+    if not paths:
+        return
+    workers = min(max(1, workers), len(paths))
+    if not timeout and workers == 1:
+        for index, path in enumerate(paths):
+            yield index, path, _extract(str(path))
+        return
+
+    if timeout:
+        print(f"⚙️ Extrayendo texto con {workers} procesos (máx. {timeout:.0f}s por archivo)")
+    else:
+        print(f"⚙️ Extrayendo texto con {workers} procesos")
+        # Sin tiempo máximo el pool no corta nunca una tarea
+        timeout = float("inf")
+    source: queue.Queue = queue.Queue()
+    for item in enumerate(paths):
+        source.put(item)
+    source.put(_DONE)
+    results: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    driver = threading.Thread(
+        target=_drive_pool,
+        args=(source, workers, timeout, results.put, stop),
+        name="extraccion-texto",
+        daemon=True
+    )
+    driver.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Si el consumidor deja de iterar, no dejar procesos trabajando
+        stop.set()
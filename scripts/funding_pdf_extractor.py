@@ -4,23 +4,28 @@ Módulo principal de extracción de oportunidades de financiamiento
 VERSIÓN FINAL CON EXTRACCIÓN HÍBRIDA (REGEX + GPT)
 """
 
-import os
-import re
 import json
 import time
+import asyncio
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Set, Tuple
-from pdfminer.high_level import extract_text as pdf_extract_text
-from pdfminer.layout import LAParams
+from typing import List, Dict, Tuple
 from docx import Document
-from docx.shared import Inches, Pt, RGBColor
+from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from openai import OpenAI
 import sys
 sys.path.append(str(Path(__file__).parent))
 
+from sidecar import find_attachments, is_attachment
+from document_text import read_document
+from extraction_pool import iter_extracted_texts
+from text_focus import clean_and_structure_text, keyword_focus, chunk_text
+from structured_info import extract_structured_info
+from llm_engine import AsyncLLMEngine, LLMError, get_llm_config
+
 def get_config():
     """Obtiene la configuración actualizada"""
     import config
@@ -31,7 +36,7 @@ def get_config():
 def get_openai_client():
     """Obtiene cliente OpenAI con config actualizada"""
     cfg = get_config()
-    return OpenAI(api_key=cfg.OPENAI_API_KEY)
+    return OpenAI(api_key=cfg.OPENAI_API_KEY, base_url=getattr(cfg, "OPENAI_BASE_URL", None))
 
 # PROMPT ULTRA ESPECÍFICO
 OPP_SYSTEM_PROMPT = """Eres experto en extraer información de Procurement Notices, especialmente de UNDP.
@@ -76,220 +81,8 @@ FORMATO JSON:
 
 IMPORTANTE: Si la información preliminar ya provee deadline o contact, ÚSALA obligatoriamente."""
 
-def read_pdf_text_enhanced(filepath: Path) -> str:
-    """Extracción mejorada con LAParams para mejor detección"""
-    try:
-        # Método 1: Con LAParams optimizado
-        laparams = LAParams(
-            line_overlap=0.5,
-            char_margin=2.0,
-            line_margin=0.5,
-            word_margin=0.1,
-            boxes_flow=0.5,
-            detect_vertical=False,
-            all_texts=False
-        )
-        
-        text = pdf_extract_text(str(filepath), laparams=laparams)
-        
-        if text and len(text) > 50:
-            text = text.replace('\x0c', '\n')
-            text = re.sub(r'\n{3,}', '\n\n', text)
-            text = re.sub(r' {2,}', ' ', text)
-            return text.strip()
-        
-        # Método 2: Sin LAParams como fallback
-        print("   ⚠️ Reintentando extracción básica...")
-        text = pdf_extract_text(str(filepath))
-        return text.strip() if text else ""
-        
-    except Exception as e:
-        print(f"   ⚠️ Error en extracción: {e}")
-        return ""
-
-def extract_deadline_aggressive(text: str) -> Optional[str]:
-    """Extracción agresiva de deadline - optimizada para UNDP"""
-    
-    # Patrón 1: "17-Oct-25 @ 01:59 AM" (formato UNDP típico)
-    pattern1 = r'(\d{1,2})-([A-Z][a-z]{2})-(\d{2})\s*@\s*(\d{1,2}):(\d{2})\s*(AM|PM)'
-    match = re.search(pattern1, text, re.IGNORECASE)
-    if match:
-        day, month_str, year, hour, minute, ampm = match.groups()
-        
-        months = {
-            'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-            'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
-            'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
-        }
-        month = months.get(month_str.lower()[:3], '01')
-        full_year = f"20{year}"
-        deadline = f"{full_year}-{month}-{day.zfill(2)}"
-        return deadline
-    
-    # Patrón 2: Buscar "DEADLINE" y fecha cercana
-    lines = text.split('\n')
-    for i, line in enumerate(lines):
-        if 'deadline' in line.lower():
-            context = '\n'.join(lines[i:min(i+3, len(lines))])
-            
-            date_patterns = [
-                r'(\d{1,2})-([A-Z][a-z]{2})-(\d{2,4})',
-                r'(\d{1,2})/(\d{1,2})/(\d{2,4})',
-                r'(\d{4})-(\d{2})-(\d{2})'
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, context)
-                if match:
-                    parts = match.groups()
-                    if len(parts) == 3:
-                        try:
-                            if '-' in match.group(0) and match.group(0)[2].isalpha():
-                                day, month_str, year = parts
-                                months = {
-                                    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-                                    'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
-                                    'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
-                                }
-                                month = months.get(month_str.lower()[:3], '01')
-                                full_year = f"20{year}" if len(year) == 2 else year
-                                return f"{full_year}-{month}-{day.zfill(2)}"
-                        except:
-                            pass
-    
-    return None
-
-def extract_contact_aggressive(text: str) -> Optional[str]:
-    """Extracción agresiva de email de contacto"""
-    
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    if emails:
-        # Priorizar emails de UNDP
-        for email in emails:
-            if 'undp' in email.lower():
-                return email
-        return emails[0]
-    
-    return None
-
-def extract_reference_number(text: str) -> Optional[str]:
-    """Extrae número de referencia formato UNDP"""
-    pattern = r'(UNDP-[A-Z]{3}-\d{5})'
-    match = re.search(pattern, text, re.IGNORECASE)
-    if match:
-        return match.group(1).upper()
-    return None
-
-def clean_and_structure_text(text: str) -> str:
-    """Limpia y marca secciones importantes del texto"""
-    if not text:
-        return ""
-    
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' {2,}', ' ', text)
-    
-    # Marcar secciones críticas con emojis para que GPT las identifique mejor
-    text = re.sub(r'(DEADLINE[\s:]*)', r'\n\n⏰ DEADLINE CRÍTICO: ', text, flags=re.IGNORECASE)
-    text = re.sub(r'(CONTACT[\s:]*)', r'\n\n📧 CONTACTO CRÍTICO: ', text, flags=re.IGNORECASE)
-    text = re.sub(r'(REFERENCE\s+NUMBER[\s:]*)', r'\n\n🔢 REFERENCIA: ', text, flags=re.IGNORECASE)
-    text = re.sub(r'(\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)', r'\n📧 EMAIL: \1', text)
-    
-    return text
-
-def extract_structured_info(text: str) -> Dict[str, str]:
-    """Extracción estructurada con regex (complementa a GPT)"""
-    info = {}
-    
-    # Deadline
-    deadline = extract_deadline_aggressive(text)
-    if deadline:
-        info['deadline'] = deadline
-        print(f"      🎯 Deadline regex: {deadline}")
-    
-    # Contact
-    contact = extract_contact_aggressive(text)
-    if contact:
-        info['contact'] = contact
-        print(f"      🎯 Contact regex: {contact}")
-    
-    # Reference
-    ref = extract_reference_number(text)
-    if ref:
-        info['reference'] = ref
-        print(f"      🎯 Referencia: {ref}")
-    
-    # Sponsor
-    if 'UNDP' in text or 'undp' in text.lower():
-        info['sponsor'] = 'UNDP'
-    
-    # País y región
-    text_upper = text.upper()
-    if 'EL SALVADOR' in text_upper or 'UNDP-SLV' in text:
-        info['country'] = 'El Salvador'
-        info['region'] = 'América Latina'
-    elif 'GUATEMALA' in text_upper or 'UNDP-GTM' in text:
-        info['country'] = 'Guatemala'
-        info['region'] = 'América Latina'
-    elif 'HONDURAS' in text_upper or 'UNDP-HND' in text:
-        info['country'] = 'Honduras'
-        info['region'] = 'América Latina'
-    
-    # URLs
-    urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text)
-    if urls:
-        info['link'] = urls[0]
-    
-    return info
-
-def keyword_focus(text: str, keywords: List[str]) -> str:
-    """Prioriza párrafos con palabras clave"""
-    if not text:
-        return ""
-    
-    paragraphs = re.split(r'\n{2,}', text)
-    relevant = []
-    other = []
-    
-    for para in paragraphs:
-        if any(kw.lower() in para.lower() for kw in keywords):
-            relevant.append(para)
-        else:
-            other.append(para)
-    
-    if relevant:
-        focused = '\n\n'.join(relevant)
-        cfg = get_config()
-        if len(focused) < cfg.CHUNK_SIZE * 3:
-            focused += '\n\n' + '\n\n'.join(other[:5])
-        return focused
-    
-    return text
-
-def chunk_text(text: str, chunk_size: int, overlap: int, max_chunks: int) -> List[str]:
-    """Divide texto en chunks con overlap"""
-    if not text:
-        return []
-    
-    words = text.split()
-    if len(words) <= chunk_size:
-        return [text]
-    
-    chunks = []
-    start = 0
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunks.append(' '.join(words[start:end]))
-        if end >= len(words):
-            break
-        start = end - overlap
-    
-    return chunks[:max_chunks]
-
-def call_summary(text: str, filename: str, client: OpenAI, cfg) -> str:
-    """Genera resumen ejecutivo del documento"""
-    if not text:
-        return "No se pudo extraer texto del documento."
-    
+def summary_messages(text: str, filename: str, cfg) -> List[Dict]:
+    """Mensajes de la llamada de resumen"""
     words = text.split()[:2000]
     text_limited = ' '.join(words)
     
@@ -300,24 +93,28 @@ Archivo: {filename}
 
 {text_limited}"""
     
+    return [
+        {"role": "system", "content": "Eres un experto en análisis de documentos."},
+        {"role": "user", "content": prompt}
+    ]
+
+def call_summary(text: str, filename: str, client: OpenAI, cfg) -> str:
+    """Genera resumen ejecutivo del documento"""
+    if not text:
+        return "No se pudo extraer texto del documento."
+    
     try:
         response = client.chat.completions.create(
             model=cfg.OPENAI_MODEL,
             temperature=0.3,
-            messages=[
-                {"role": "system", "content": "Eres un experto en análisis de documentos."},
-                {"role": "user", "content": prompt}
-            ]
+            messages=summary_messages(text, filename, cfg)
         )
         return response.choices[0].message.content.strip()
     except Exception as e:
         return f"Error generando resumen: {str(e)}"
 
-def call_json_extract(text_chunk: str, filename: str, structured_info: Dict, client: OpenAI, cfg) -> Dict:
-    """Extrae oportunidades con contexto de info ya encontrada"""
-    if not text_chunk:
-        return {"opportunities": []}
-    
+def extract_messages(text_chunk: str, filename: str, structured_info: Dict, cfg) -> List[Dict]:
+    """Mensajes de la llamada de extracción de un bloque"""
     # Crear hints con información ya extraída
     hints = "\n".join([f"- {k}: {v}" for k, v in structured_info.items()])
     
@@ -346,23 +143,33 @@ TEXTO A ANALIZAR:
 
 Devuelve JSON con opportunities. USA la info preliminar obligatoriamente."""
     
+    return [
+        {"role": "system", "content": OPP_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+
+def parse_opportunities(content: str) -> Dict:
+    """JSON de la respuesta con la lista de oportunidades (lanza si no es JSON)"""
+    result = json.loads(content)
+    if isinstance(result, dict) and isinstance(result.get("opportunities"), list):
+        return result
+    return {"opportunities": []}
+
+def call_json_extract(text_chunk: str, filename: str, structured_info: Dict, client: OpenAI, cfg) -> Dict:
+    """Extrae oportunidades con contexto de info ya encontrada"""
+    if not text_chunk:
+        return {"opportunities": []}
+    
     for attempt in range(cfg.MAX_RETRIES):
         try:
             response = client.chat.completions.create(
                 model=cfg.OPENAI_MODEL,
                 temperature=cfg.OPENAI_TEMPERATURE,
                 response_format={"type": "json_object"},
-                messages=[
-                    {"role": "system", "content": OPP_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ]
+                messages=extract_messages(text_chunk, filename, structured_info, cfg)
             )
             
-            result = json.loads(response.choices[0].message.content)
-            
-            if "opportunities" in result and isinstance(result["opportunities"], list):
-                return result
-            return {"opportunities": []}
+            return parse_opportunities(response.choices[0].message.content)
                 
         except json.JSONDecodeError:
             if attempt == cfg.MAX_RETRIES - 1:
@@ -393,13 +200,13 @@ def dedupe_opportunities(items: List[Dict]) -> List[Dict]:
     
     return deduped
 
-def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict], str]:
-    """Pipeline completo de extracción"""
-    if not text:
-        return [], "Documento vacío o sin texto extraíble."
-    
+def prepare_text(text: str, streamed_info: Dict[str, str] = None) -> Tuple[str, Dict[str, str], List[str]]:
+    """
+    Limpieza, regex y bloques de un documento: (texto, info regex, bloques)
+    streamed_info es lo que la regex encontró al leer el PDF por páginas,
+    incluidas las partes que no llegan a text; tiene prioridad
+    """
     cfg = get_config()
-    client = get_openai_client()
     
     print(f"   📝 Texto extraído: {len(text)} caracteres")
     
@@ -414,15 +221,14 @@ def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict
     # REGEX PRIMERO (esto es clave)
     print(f"   🔍 Extrayendo con regex...")
     structured_info = extract_structured_info(text)
+    if streamed_info:
+        print(f"   🔍 Regex en las páginas leídas: {list(streamed_info.keys())}")
+        structured_info.update(streamed_info)
     if structured_info:
         print(f"   ✅ Regex encontró: {list(structured_info.keys())}")
     else:
         print(f"   ⚠️ Regex no encontró información clave")
     
-    # Resumen
-    print(f"   🤖 Generando resumen...")
-    summary = call_summary(text, filename, client, cfg)
-    
     # Filtro de keywords
     print(f"   🎯 Aplicando filtro de keywords...")
     focused_text = keyword_focus(text, cfg.KEYWORDS)
@@ -431,13 +237,14 @@ def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict
     chunks = chunk_text(focused_text, cfg.CHUNK_SIZE, cfg.CHUNK_OVERLAP, cfg.MAX_CHUNKS_PER_DOC)
     print(f"   📦 Texto dividido en {len(chunks)} bloques")
     
+    return text, structured_info, chunks
+
+def finalize_opportunities(chunk_results: List[Dict], structured_info: Dict, filename: str) -> List[Dict]:
+    """Completa las oportunidades de todos los bloques con la info regex y las depura"""
+    cfg = get_config()
     all_opportunities = []
     
-    for i, chunk in enumerate(chunks, 1):
-        print(f"   🔄 Analizando bloque {i}/{len(chunks)}...")
-        
-        # Pasar structured_info a GPT
-        result = call_json_extract(chunk, filename, structured_info, client, cfg)
+    for result in chunk_results:
         opportunities = result.get("opportunities", [])
         
         # FORZAR campos críticos de regex
@@ -462,9 +269,6 @@ def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict
                 opp['currency'] = "USD"
         
         all_opportunities.extend(opportunities)
-        
-        if i < len(chunks):
-            time.sleep(cfg.RATE_LIMIT_DELAY)
     
     all_opportunities = dedupe_opportunities(all_opportunities)
     
@@ -474,7 +278,7 @@ def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict
             if opp.get("status", "unknown").lower() != "closed"
         ]
     
-    print(f"   ✅ {len(all_opportunities)} oportunidades encontradas")
+    print(f"   ✅ {filename}: {len(all_opportunities)} oportunidades encontradas")
     
     # Estadísticas de completitud
     for opp in all_opportunities:
@@ -485,7 +289,76 @@ def extract_opportunities_from_text(text: str, filename: str) -> Tuple[List[Dict
         print(f"         📅 Deadline: {opp.get('deadline', 'N/A')}")
         print(f"         📧 Contact: {opp.get('contact', 'N/A')}")
     
-    return all_opportunities, summary
+    return all_opportunities
+
+def extract_opportunities_from_text(text: str, filename: str,
+                                    info: Dict[str, str] = None) -> Tuple[List[Dict], str]:
+    """Pipeline completo de extracción (info: regex de la lectura por páginas)"""
+    if not text:
+        return [], "Documento vacío o sin texto extraíble."
+    
+    cfg = get_config()
+    client = get_openai_client()
+    
+    text, structured_info, chunks = prepare_text(text, info)
+    
+    # Resumen
+    print(f"   🤖 Generando resumen...")
+    summary = call_summary(text, filename, client, cfg)
+    
+    chunk_results = []
+    
+    for i, chunk in enumerate(chunks, 1):
+        print(f"   🔄 Analizando bloque {i}/{len(chunks)}...")
+        
+        # Pasar structured_info a GPT
+        chunk_results.append(call_json_extract(chunk, filename, structured_info, client, cfg))
+        
+        if i < len(chunks):
+            time.sleep(cfg.RATE_LIMIT_DELAY)
+    
+    return finalize_opportunities(chunk_results, structured_info, filename), summary
+
+async def extract_opportunities_async(engine: AsyncLLMEngine, text: str, filename: str,
+                                     info: Dict[str, str] = None) -> Tuple[List[Dict], str]:
+    """
+    Igual que extract_opportunities_from_text, pero el resumen y todos los
+    bloques se envían a la vez; el motor marca el ritmo con sus límites
+    """
+    if not text:
+        return [], "Documento vacío o sin texto extraíble."
+    
+    cfg = get_config()
+    text, structured_info, chunks = prepare_text(text, info)
+    print(f"   🤖 {filename}: resumen y {len(chunks)} bloques en paralelo...")
+    
+    async def summary_call() -> str:
+        try:
+            content = await engine.chat(summary_messages(text, filename, cfg), temperature=0.3)
+            return content.strip()
+        except LLMError as e:
+            return f"Error generando resumen: {str(e)}"
+    
+    async def chunk_call(chunk: str) -> Dict:
+        try:
+            content = await engine.chat(extract_messages(chunk, filename, structured_info, cfg),
+                                        temperature=cfg.OPENAI_TEMPERATURE, json_mode=True)
+            return parse_opportunities(content)
+        except LLMError as e:
+            print(f"   ⚠️ Error API ({filename}): {str(e)[:120]}")
+            return {"opportunities": []}
+    
+    summary, *chunk_results = await asyncio.gather(summary_call(), *(chunk_call(c) for c in chunks))
+    return finalize_opportunities(chunk_results, structured_info, filename), summary
+
+def list_documents(folder: Path) -> List[Path]:
+    """
+    Documentos a analizar de una carpeta: PDFs y páginas estáticas guardadas
+    como HTML por el exportador. Los anexos se analizan junto con su
+    documento, no por separado
+    """
+    documents = list(folder.glob("*.pdf")) + list(folder.glob("*.html"))
+    return sorted((f for f in documents if not is_attachment(f)), key=lambda f: f.name)
 
 def process_pdf_folder(input_folder: Path = None, output_folder: Path = None) -> Dict:
     """Procesa todos los PDFs en una carpeta"""
@@ -501,60 +374,193 @@ def process_pdf_folder(input_folder: Path = None, output_folder: Path = None) ->
     
     output_folder.mkdir(parents=True, exist_ok=True)
     
-    pdf_files = list(input_folder.glob("*.pdf"))
+    pdf_files = list_documents(input_folder)
     
     if not pdf_files:
-        print("❌ No se encontraron PDFs en la carpeta")
-        return {"error": "No PDFs found"}
+        print("❌ No se encontraron documentos (PDF o HTML) en la carpeta")
+        return {"error": "No documents found"}
     
     print(f"\n{'='*70}")
-    print(f"📚 PROCESANDO {len(pdf_files)} PDFs")
+    print(f"📚 PROCESANDO {len(pdf_files)} DOCUMENTOS")
     print(f"{'='*70}")
     
-    all_results = []
-    all_opportunities = []
+    # El texto se extrae en paralelo y cada documento se analiza en cuanto
+    # está listo; los resultados se guardan en orden de nombre de archivo
+    if get_llm_config()["async"]:
+        analyzed = asyncio.run(analyze_documents_async(pdf_files))
+    else:
+        analyzed: Dict[int, Dict] = {}
+        for done, (idx, pdf_path, document) in enumerate(iter_extracted_texts(pdf_files), 1):
+            print(f"\n📄 [{done}/{len(pdf_files)}] {pdf_path.name}")
+            print(f"   {'-'*60}")
+            
+            analyzed[idx] = analyze_document(pdf_path, document)
     
-    for idx, pdf_path in enumerate(pdf_files, 1):
-        print(f"\n📄 [{idx}/{len(pdf_files)}] {pdf_path.name}")
-        print(f"   {'-'*60}")
-        
-        text = read_pdf_text_enhanced(pdf_path)
-        
-        if not text or len(text) < 50:
-            print(f"   ⚠️ No se pudo extraer texto suficiente")
-            all_results.append({
+    all_results = [analyzed[idx] for idx in sorted(analyzed)]
+    return save_results(all_results, output_folder)
+
+def no_text_result(filename: str) -> Dict:
+    print(f"   ⚠️ No se pudo extraer texto suficiente")
+    return {
+        "filename": filename,
+        "summary": "No se pudo extraer texto del PDF",
+        "opportunities_count": 0,
+        "opportunities": []
+    }
+
+def document_result(filename: str, summary: str, opportunities: List[Dict]) -> Dict:
+    """Entrada de resultados de un documento analizado"""
+    print(f"\n   📋 RESUMEN ({filename}):")
+    for line in summary.split('\n')[:3]:
+        print(f"      {line}")
+    
+    if opportunities:
+        print(f"\n   💰 {len(opportunities)} OPORTUNIDADES ENCONTRADAS:")
+        for i, opp in enumerate(opportunities[:2], 1):
+            print(f"      {i}. {opp.get('title', 'Sin título')[:60]}")
+    
+    return {
+        "filename": filename,
+        "summary": summary,
+        "opportunities_count": len(opportunities),
+        "opportunities": opportunities
+    }
+
+def analyze_text(text: str, filename: str, info: Dict[str, str] = None) -> Dict:
+    """Analiza el texto de un documento y devuelve su entrada de resultados"""
+    if not text or len(text) < 50:
+        return no_text_result(filename)
+    
+    opportunities, summary = extract_opportunities_from_text(text, filename, info)
+    return document_result(filename, summary, opportunities)
+
+async def analyze_text_async(engine: AsyncLLMEngine, text: str, filename: str,
+                             info: Dict[str, str] = None) -> Dict:
+    """analyze_text con el motor asíncrono"""
+    if not text or len(text) < 50:
+        return no_text_result(filename)
+    
+    opportunities, summary = await extract_opportunities_async(engine, text, filename, info)
+    return document_result(filename, summary, opportunities)
+
+def add_attachments(result: Dict, pdf_path: Path) -> Dict:
+    attachments = find_attachments(pdf_path)
+    if attachments:
+        result["attachments"] = [attachment.name for attachment in attachments]
+    return result
+
+def analyze_document(pdf_path: Path, document: Dict = None) -> Dict:
+    """
+    Lee un PDF (o su sidecar) junto con sus anexos y lo analiza
+    Si ya se extrajo (p. ej. en el pool de procesos), se pasa en document
+    lo que devolvió document_text.read_document
+    """
+    if document is None:
+        document = read_document(pdf_path)
+    return add_attachments(analyze_text(document["text"], pdf_path.name, document["info"]), pdf_path)
+
+async def analyze_document_async(engine: AsyncLLMEngine, pdf_path: Path, document: Dict) -> Dict:
+    """
+    analyze_document con el motor asíncrono, para un documento ya extraído
+    (document es lo que devolvió document_text.read_document)
+    """
+    result = await analyze_text_async(engine, document["text"], pdf_path.name, document["info"])
+    return add_attachments(result, pdf_path)
+
+def create_llm_engine() -> AsyncLLMEngine:
+    """Motor asíncrono con la clave, el modelo y los límites de config.py"""
+    cfg = get_config()
+    return AsyncLLMEngine(
+        api_key=cfg.OPENAI_API_KEY,
+        model=cfg.OPENAI_MODEL,
+        llm_config=get_llm_config(),
+        base_url=getattr(cfg, "OPENAI_BASE_URL", None),
+        max_retries=cfg.MAX_RETRIES
+    )
+
+async def analyze_documents_async(pdf_files: List[Path]) -> Dict[int, Dict]:
+    """
+    Analiza los documentos a medida que el pool termina de extraerlos, todos
+    a la vez: los límites RPM/TPM del motor sustituyen a RATE_LIMIT_DELAY
+    """
+    analyzed: Dict[int, Dict] = {}
+    
+    async def analyze(idx: int, pdf_path: Path, document: Dict):
+        try:
+            result = await analyze_text_async(engine, document["text"], pdf_path.name, document["info"])
+        except Exception as e:
+            print(f"❌ Error analizando {pdf_path.name}: {e}")
+            result = {
                 "filename": pdf_path.name,
-                "summary": "No se pudo extraer texto del PDF",
+                "summary": f"Error en el análisis: {e}",
                 "opportunities_count": 0,
                 "opportunities": []
-            })
-            continue
-        
-        opportunities, summary = extract_opportunities_from_text(text, pdf_path.name)
-        
-        result = {
-            "filename": pdf_path.name,
-            "summary": summary,
-            "opportunities_count": len(opportunities),
-            "opportunities": opportunities
-        }
-        
-        all_results.append(result)
-        all_opportunities.extend(opportunities)
-        
-        print(f"\n   📋 RESUMEN:")
-        for line in summary.split('\n')[:3]:
-            print(f"      {line}")
-        
-        if opportunities:
-            print(f"\n   💰 {len(opportunities)} OPORTUNIDADES ENCONTRADAS:")
-            for i, opp in enumerate(opportunities[:2], 1):
-                print(f"      {i}. {opp.get('title', 'Sin título')[:60]}")
+            }
+        analyzed[idx] = add_attachments(result, pdf_path)
+    
+    started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    
+    def produce():
+        # El generador solo se usa en este hilo: cerrarlo aquí no choca
+        # con un next() en curso aunque se cancele el análisis
+        texts = iter_extracted_texts(pdf_files)
+        try:
+            for item in texts:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(items.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(items.put_nowait, e)
+        finally:
+            texts.close()
+            loop.call_soon_threadsafe(items.put_nowait, None)
+    
+    # La extracción sigue en su hilo mientras se esperan las respuestas
+    producer = threading.Thread(target=produce, name="extraccion", daemon=True)
+    async with create_llm_engine() as engine:
+        tasks = []
+        producer.start()
+        try:
+            while True:
+                item = await items.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                idx, pdf_path, document = item
+                print(f"\n📄 [{len(tasks) + 1}/{len(pdf_files)}] {pdf_path.name} → análisis en curso")
+                tasks.append(asyncio.create_task(analyze(idx, pdf_path, document)))
+            await asyncio.gather(*tasks)
+        finally:
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            # Esperar a que el hilo termine el documento en curso y cierre el pool
+            await loop.run_in_executor(None, producer.join)
+        stats = engine.stats
+    print(f"\n⚡ {stats['calls']} llamadas al LLM ({stats['tokens']} tokens, "
+          f"{stats['retries']} reintentos) en {time.monotonic() - started:.0f}s")
+    return analyzed
+
+def save_results(all_results: List[Dict], output_folder: Path = None) -> Dict:
+    """Guarda los resultados en JSON y DOCX y devuelve el JSON generado"""
+    cfg = get_config()
+    
+    if output_folder is None:
+        output_folder = cfg.RESULTADOS
+    output_folder.mkdir(parents=True, exist_ok=True)
+    
+    all_opportunities = []
+    for result in all_results:
+        all_opportunities.extend(result["opportunities"])
     
     # Guardar JSON
     json_output = {
         "processing_date": datetime.now().isoformat(),
-        "total_pdfs": len(pdf_files),
+        "total_pdfs": len(all_results),
         "total_opportunities": len(all_opportunities),
         "language": cfg.LANGUAGE_OUTPUT,
         "keep_closed": cfg.KEEP_CLOSED,
@@ -571,7 +577,7 @@ def process_pdf_folder(input_folder: Path = None, output_folder: Path = None) ->
     print(f"\n{'='*70}")
     print(f"✅ PROCESO COMPLETADO")
     print(f"{'='*70}")
-    print(f"   • PDFs procesados: {len(pdf_files)}")
+    print(f"   • Documentos procesados: {len(all_results)}")
     print(f"   • Oportunidades encontradas: {len(all_opportunities)}")
     print(f"   • Archivo JSON: {json_path}")
     print(f"   • Documento Word: {docx_path}")
@@ -0,0 +1,141 @@
+# scripts/html_text.py
+"""
+Texto de páginas HTML sin navegador
+Produce la misma captura (título, texto, títulos, enlaces, correos) que el
+script de DOM del exportador, a partir del HTML tal como llega del servidor
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, unquote
+
+# Etiquetas cuyo contenido no es texto visible
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "object", "head"}
+
+# Etiquetas que separan bloques de texto
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+              "li", "ul", "ol", "table", "tr", "td", "th", "br", "h1", "h2", "h3", "h4",
+              "h5", "h6", "dl", "dt", "dd", "blockquote", "pre", "form", "hr"}
+
+# Avisos de páginas que solo muestran contenido con JavaScript
+JS_REQUIRED = re.compile(
+    r"enable javascript|javascript (is )?required|activa(r)? (el )?javascript|"
+    r"habilita(r)? (el )?javascript|requires javascript|you need to enable javascript",
+    re.IGNORECASE
+)
+
+# Contenedores vacíos típicos de aplicaciones de una sola página
+SPA_SHELL = re.compile(r'<div[^>]+id=["\'](root|app|__next|___gatsby)["\'][^>]*>\s*</div>', re.IGNORECASE)
+
+class HtmlCapture(HTMLParser):
+    """Recorre el HTML y acumula texto visible, títulos, enlaces y correos"""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ""
+        self.parts: List[str] = []
+        self.headings: List[Dict] = []
+        self.links: List[Dict] = []
+        self.emails: List[str] = []
+        self._skip = 0
+        self._in_title = False
+        self._heading: Optional[int] = None
+        self._heading_text: List[str] = []
+        self._href: Optional[str] = None
+        self._link_text: List[str] = []
+        self._seen_links = set()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "base" and attrs.get("href"):
+            self.base_url = urljoin(self.base_url, attrs["href"])
+        if tag == "title":
+            self._in_title = True
+        if tag == "body":
+            # </head> es opcional en HTML5
+            self._skip = 0
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in ("h1", "h2", "h3"):
+            self._heading = int(tag[1])
+            self._heading_text = []
+        if tag == "a" and attrs.get("href"):
+            self._href = attrs["href"]
+            self._link_text = []
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+        if tag in ("h1", "h2", "h3") and self._heading is not None:
+            text = " ".join("".join(self._heading_text).split())
+            if text:
+                self.headings.append({"level": self._heading, "text": text})
+            self._heading = None
+        if tag == "a" and self._href is not None:
+            self._add_link(self._href, " ".join("".join(self._link_text).split()))
+            self._href = None
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if self._skip:
+            return
+        self.parts.append(data)
+        if self._heading is not None:
+            self._heading_text.append(data)
+        if self._href is not None:
+            self._link_text.append(data)
+
+    def _add_link(self, href: str, text: str):
+        if href.lower().startswith("mailto:"):
+            email = unquote(href[7:].split("?")[0]).strip()
+            if email and email not in self.emails:
+                self.emails.append(email)
+            return
+        url = urljoin(self.base_url, href)
+        if not url.startswith("http") or url in self._seen_links:
+            return
+        self._seen_links.add(url)
+        self.links.append({"href": url, "text": text})
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+def html_to_capture(html: str, base_url: str) -> Dict:
+    """Captura equivalente a DOM_CAPTURE_SCRIPT a partir del HTML en bruto"""
+    parser = HtmlCapture(base_url)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    return {
+        "title": " ".join(parser.title.split()),
+        "text": parser.text(),
+        "headings": parser.headings,
+        "links": parser.links,
+        "emails": parser.emails
+    }
+
+def has_static_content(capture: Dict, html: str, min_text: int = 1500) -> bool:
+    """
+    True si el HTML sin ejecutar JavaScript ya trae el contenido útil:
+    texto suficiente y ningún indicio de aplicación que se pinta en cliente
+    """
+    text = capture.get("text", "")
+    if len(text) < min_text:
+        return False
+    if SPA_SHELL.search(html) and len(text) < min_text * 2:
+        return False
+    return not JS_REQUIRED.search(text[:2000])
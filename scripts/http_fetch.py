@@ -0,0 +1,158 @@
+# scripts/http_fetch.py
+"""
+Cliente HTTP ligero (httpx) para el exportador
+Sondeos HEAD y descargas que no necesitan un navegador
+"""
+
+import re
+import hashlib
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional
+from urllib.parse import urlparse, unquote
+import httpx
+
+# Mismo User-Agent que el contexto de Playwright para no cambiar de "identidad"
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+
+def create_http_client(timeout: float = 20, max_connections: int = 20) -> httpx.AsyncClient:
+    """
+    Crea un cliente async con pool de conexiones y redirecciones
+    """
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        follow_redirects=True,
+        timeout=httpx.Timeout(timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+
+def _probe_from_response(response: httpx.Response) -> Dict:
+    headers = response.headers
+    content_length = headers.get('content-length')
+    return {
+        "status": response.status_code,
+        "final_url": str(response.url),
+        "content_type": headers.get('content-type', '').split(';')[0].strip().lower(),
+        "content_length": int(content_length) if content_length and content_length.isdigit() else None,
+        "etag": headers.get('etag'),
+        "last_modified": headers.get('last-modified'),
+        "content_disposition": headers.get('content-disposition')
+    }
+
+async def probe_url(client: httpx.AsyncClient, url: str) -> Optional[Dict]:
+    """
+    Obtiene cabeceras de una URL sin descargar el cuerpo
+    Usa HEAD y, si el servidor no lo admite, un GET que se corta tras las cabeceras
+    Devuelve None si la URL no responde
+    """
+    try:
+        response = await client.head(url)
+        if response.status_code not in (403, 405, 501):
+            return _probe_from_response(response)
+
+        async with client.stream('GET', url) as response:
+            return _probe_from_response(response)
+    except httpx.HTTPError:
+        return None
+
+async def fetch_html(client: httpx.AsyncClient, url: str,
+                     max_bytes: int = 5 * 1024 * 1024) -> Optional[Dict]:
+    """
+    Descarga el HTML de una página sin navegador
+    Devuelve None si la respuesta no es HTML, es un error o supera max_bytes
+    """
+    try:
+        async with client.stream('GET', url) as response:
+            probe = _probe_from_response(response)
+            if response.status_code >= 400 or 'html' not in probe["content_type"]:
+                return None
+            body = bytearray()
+            async for chunk in response.aiter_bytes(64 * 1024):
+                body.extend(chunk)
+                if len(body) > max_bytes:
+                    return None
+            probe["html"] = bytes(body).decode(response.encoding or 'utf-8', errors='replace')
+            return probe
+    except httpx.HTTPError:
+        return None
+
+def filename_from_headers(content_disposition: Optional[str], url: str) -> str:
+    """
+    Nombre de archivo sugerido por Content-Disposition o por la ruta de la URL
+    """
+    if content_disposition:
+        match = re.search(r"filename\*=(?:UTF-8'')?([^;]+)|filename=\"?([^\";]+)\"?",
+                          content_disposition, re.IGNORECASE)
+        if match:
+            return unquote((match.group(1) or match.group(2)).strip())
+    name = PurePosixPath(unquote(urlparse(url).path)).name
+    return name or "documento"
+
+def is_pdf_response(probe: Optional[Dict], url: str) -> bool:
+    """
+    Indica si la URL sirve un PDF directamente (no una página HTML)
+    """
+    if not probe or probe["status"] >= 400:
+        return False
+    content_type = probe["content_type"]
+    if content_type == 'application/pdf':
+        return True
+    if not content_type:
+        return urlparse(url).path.lower().endswith('.pdf')
+    if content_type in ('application/octet-stream', 'binary/octet-stream', 'application/x-download'):
+        name = filename_from_headers(probe.get("content_disposition"), probe["final_url"])
+        return name.lower().endswith('.pdf')
+    return False
+
+async def download_file(
+    client: httpx.AsyncClient,
+    url: str,
+    dest: Path,
+    max_bytes: Optional[int] = None,
+    expected_magic: Optional[bytes] = None
+) -> Dict:
+    """
+    Descarga una URL a disco en streaming (sin cargarla entera en memoria)
+    Escribe primero a un .part y lo renombra al terminar; aborta si supera
+    max_bytes o si los primeros bytes no coinciden con expected_magic
+    """
+    tmp_path = dest.with_name(dest.name + '.part')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with client.stream('GET', url) as response:
+            response.raise_for_status()
+            declared = response.headers.get('content-length')
+            if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ValueError(f"Archivo demasiado grande ({int(declared) // 1024} KB)")
+
+            with open(tmp_path, 'wb') as f:
+                async for chunk in response.aiter_bytes(64 * 1024):
+                    if size == 0 and expected_magic and not chunk.startswith(expected_magic):
+                        raise ValueError("El contenido no tiene el formato esperado")
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise ValueError(f"Archivo demasiado grande (> {max_bytes // 1024} KB)")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            headers = response.headers
+            result = {
+                "bytes": size,
+                "sha256": digest.hexdigest(),
+                "etag": headers.get('etag'),
+                "last_modified": headers.get('last-modified')
+            }
+        tmp_path.replace(dest)
+        return result
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
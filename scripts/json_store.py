@@ -0,0 +1,128 @@
+# scripts/json_store.py
+"""
+Almacenes persistidos en JSON (memoria de cookies, manifiesto, perfiles...)
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Set
+
+# Segundos que se espera el cerrojo de otro proceso antes de no guardar
+LOCK_TIMEOUT = 30
+# Un cerrojo más antiguo que esto es de un proceso que murió al guardar
+LOCK_STALE = 120
+LOCK_POLL = 0.05
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[bool]:
+    """
+    Cerrojo entre procesos con un archivo .lock creado en exclusiva
+    Entrega True si se obtuvo; False si otro proceso lo retiene demasiado
+    """
+    lock = path.with_name(path.name + '.lock')
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > LOCK_STALE:
+                    lock.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                yield False
+                return
+            time.sleep(LOCK_POLL)
+    try:
+        yield True
+    finally:
+        try:
+            lock.unlink()
+        except FileNotFoundError:
+            pass
+
+class JsonStore:
+    """
+    Diccionario persistido en un archivo JSON, guardado solo si cambió
+
+    Al guardar se vuelve a leer el archivo y solo se sobrescriben las claves
+    modificadas, para que varios procesos puedan compartir el mismo archivo.
+    La lectura, la fusión y la escritura se hacen bajo un cerrojo de archivo
+    y la escritura es atómica (archivo temporal y os.replace).
+    """
+
+    def __init__(self, path: Path, label: str):
+        self.path = path
+        self.label = label
+        self._dirty = False
+        self._changed: Set[str] = set()
+        self.entries: Dict[str, Dict] = self.read_disk()
+
+    def set(self, key: str, value: Dict):
+        """Actualiza una entrada y la marca para guardar"""
+        self.entries[key] = value
+        self._changed.add(key)
+        self._dirty = True
+
+    def read_disk(self, strict: bool = False) -> Dict[str, Dict]:
+        """
+        Contenido actual del archivo (vacío si no existe)
+        Si está dañado se reinicia, salvo con strict, que lanza la excepción
+        """
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            if strict:
+                raise
+            print(f"⚠️ {self.label} ilegible, se reinicia: {e}")
+            return {}
+
+    def merge_into(self, merged: Dict[str, Dict]):
+        """Aplica los cambios pendientes sobre el contenido leído del disco"""
+        merged.update({key: self.entries[key] for key in self._changed})
+
+    def clear_pending(self):
+        self._changed.clear()
+
+    def save(self):
+        if not self._dirty:
+            return
+        with file_lock(self.path) as locked:
+            if not locked:
+                print(f"⚠️ {self.label} bloqueado por otro proceso, se guardará más tarde")
+                return
+            try:
+                merged = self.read_disk(strict=True)
+            except Exception as e:
+                # Guardar sobre {} borraría lo de los demás procesos
+                print(f"⚠️ {self.label} ilegible, no se guarda para no perder datos: {e}")
+                return
+            self.merge_into(merged)
+            self.entries = merged
+            self.write()
+            if not self._dirty:
+                self.clear_pending()
+
+    def write(self):
+        """Escribe entries tal cual en el archivo"""
+        tmp = self.path.with_name(self.path.name + f'.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar {self.label}: {e}")
+            try:
+                tmp.unlink()
+            except FileNotFoundError:
+                pass
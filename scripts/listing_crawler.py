@@ -0,0 +1,275 @@
+# scripts/listing_crawler.py
+"""
+Rastreador de páginas de listados de convocatorias
+Parte de los índices de los financiadores (avisos, licitaciones...), sigue
+su paginación, encuentra los enlaces de detalle y los pasa al exportador
+"""
+
+import re
+import asyncio
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+from http_fetch import create_http_client
+from json_store import JsonStore
+from webpage_print_to_pdf import export_urls, get_cache_dir
+
+# Valores por defecto si config.py no define CRAWLER_CONFIG
+DEFAULT_CRAWLER_CONFIG = {
+    "max_concurrency": 8,      # Descargas de listados a la vez
+    "per_host": 2,             # Descargas a la vez por host
+    "max_pages": 5,            # Páginas de paginación por fuente
+    "max_links": 500,          # Enlaces de detalle por fuente
+    "only_new": True           # Exportar solo URLs no exportadas antes
+}
+
+# Enlaces de detalle por defecto si la fuente no define "include"
+DETAIL_HINTS = re.compile(
+    r"grant|funding|fund|call|convocatoria|tender|notice|opportunit|rfp|rfq|eoi|"
+    r"licitaci|beca|fellowship|award|subvenci|concurso|solicitation",
+    re.IGNORECASE
+)
+
+# Textos de enlace de "página siguiente"
+NEXT_TEXTS = re.compile(r"^\s*(next|siguiente|suivant|›|»|>)\s*$", re.IGNORECASE)
+
+# Parámetros que no cambian el contenido (seguimiento, sesión)
+TRACKING_PARAMS = re.compile(r"^(utm_.*|fbclid|gclid|mc_cid|mc_eid|_ga|sessionid|jsessionid|phpsessid|sid)$",
+                             re.IGNORECASE)
+
+# Extensiones que no son páginas de detalle
+SKIP_EXTENSIONS = re.compile(r"\.(jpg|jpeg|png|gif|svg|css|js|ico|zip|mp4|mp3|xml|rss)$", re.IGNORECASE)
+
+def get_crawler_config() -> Tuple[List[Dict], Dict]:
+    """Fuentes de listados y configuración del rastreador desde config.py"""
+    import config
+    import importlib
+    importlib.reload(config)
+    crawler_config = dict(DEFAULT_CRAWLER_CONFIG)
+    crawler_config.update(getattr(config, "CRAWLER_CONFIG", {}))
+    return list(getattr(config, "LISTING_SOURCES", [])), crawler_config
+
+def canonicalize_url(url: str, base: str = None) -> Optional[str]:
+    """
+    Forma canónica de una URL para deduplicar: absoluta, sin fragmento,
+    host en minúsculas, sin puerto por defecto ni parámetros de seguimiento,
+    con los parámetros ordenados y sin barra final
+    """
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url.strip())
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+    host = parsed.hostname.lower()
+    if parsed.port and parsed.port != {'http': 80, 'https': 443}[parsed.scheme]:
+        host = f"{host}:{parsed.port}"
+    path = re.sub(r';jsessionid=[^/?]*', '', parsed.path, flags=re.IGNORECASE) or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    return urlunparse((parsed.scheme, host, path, '', query, ''))
+
+class LinkExtractor(HTMLParser):
+    """Extrae (href, texto) de los enlaces y el rel=next de una página"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base: Optional[str] = None
+        self.links: List[Tuple[str, str]] = []
+        self.next_links: List[str] = []
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'base' and attrs.get('href') and self.base is None:
+            self.base = attrs['href']
+        elif tag in ('a', 'link') and attrs.get('href'):
+            if 'next' in (attrs.get('rel') or '').lower().split():
+                self.next_links.append(attrs['href'])
+            if tag == 'a':
+                self._href = attrs['href']
+                self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            text = " ".join("".join(self._text).split())
+            self.links.append((self._href, text))
+            if NEXT_TEXTS.match(text):
+                self.next_links.append(self._href)
+            self._href = None
+
+def bare_host(host: Optional[str]) -> str:
+    """Host sin el prefijo www."""
+    host = host or ''
+    return host[4:] if host.startswith('www.') else host
+
+class SeenUrls(JsonStore):
+    """URLs de detalle ya exportadas, para rastrear solo novedades"""
+
+    def __init__(self, path: Path):
+        super().__init__(path, "URLs rastreadas")
+
+    def is_new(self, url: str) -> bool:
+        return url not in self.entries
+
+    def mark(self, url: str, source: str):
+        self.set(url, {"source": source, "exported": time.time()})
+
+class ListingCrawler:
+    """
+    Rastrea fuentes de listados con concurrencia async y límite por host
+
+    Cada fuente es un dict con "url" y opcionalmente:
+      include / exclude: regex que deben cumplir (o no) los enlaces de detalle
+      next: regex de los enlaces de paginación (además de rel=next y "Siguiente")
+      same_host: solo enlaces del mismo host (True por defecto)
+      max_pages: páginas de paginación a seguir
+    """
+
+    def __init__(self, crawler_config: Dict, log: Callable[[str], None] = print):
+        self.config = crawler_config
+        self.log = log
+        self.global_limit = asyncio.Semaphore(max(1, crawler_config["max_concurrency"]))
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(self, client, url: str) -> Optional[Tuple[str, str]]:
+        """HTML y URL final de una página de listado (None si falla)"""
+        host = urlparse(url).hostname or ''
+        host_limit = self.host_limits.setdefault(host, asyncio.Semaphore(max(1, self.config["per_host"])))
+        async with host_limit:
+            async with self.global_limit:
+                try:
+                    response = await client.get(url)
+                except Exception as e:
+                    self.log(f"   ⚠️ No se pudo leer {url[:80]}: {str(e)[:80]}")
+                    return None
+        if response.status_code >= 400:
+            self.log(f"   ⚠️ {url[:80]} respondió {response.status_code}")
+            return None
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            return None
+        return response.text, str(response.url)
+
+    def is_detail(self, source: Dict, url: str, text: str, listing_host: str) -> bool:
+        if SKIP_EXTENSIONS.search(urlparse(url).path):
+            return False
+        if source.get("same_host", True) and bare_host(urlparse(url).hostname) != bare_host(listing_host):
+            return False
+        if any(re.search(pattern, url) for pattern in source.get("exclude", [])):
+            return False
+        if source.get("include"):
+            return any(re.search(pattern, url) for pattern in source["include"])
+        return bool(DETAIL_HINTS.search(url) or DETAIL_HINTS.search(text))
+
+    async def crawl_source(self, client, source: Dict) -> List[str]:
+        """Enlaces de detalle canónicos de una fuente, siguiendo su paginación"""
+        start = canonicalize_url(source["url"])
+        max_pages = source.get("max_pages", self.config["max_pages"])
+        next_pattern = source.get("next")
+        visited: Set[str] = set()
+        found: Dict[str, None] = {}
+        page_url = start
+        while page_url and len(visited) < max_pages and len(found) < self.config["max_links"]:
+            visited.add(page_url)
+            fetched = await self.fetch(client, page_url)
+            if fetched is None:
+                break
+            html, final_url = fetched
+            parser = LinkExtractor()
+            try:
+                parser.feed(html)
+            except Exception as e:
+                # Se siguen usando los enlaces leídos antes del error
+                self.log(f"   ⚠️ HTML no analizable en {page_url[:80]}: {str(e)[:80]}")
+            base = urljoin(final_url, parser.base) if parser.base else final_url
+            listing_host = urlparse(final_url).hostname
+
+            candidates = [canonicalize_url(href, base) for href in parser.next_links]
+            if next_pattern:
+                candidates += [canonicalize_url(href, base) for href, _ in parser.links
+                               if re.search(next_pattern, href)]
+            for href, text in parser.links:
+                url = canonicalize_url(href, base)
+                if url and url not in visited and url != start and url not in candidates \
+                        and self.is_detail(source, url, text, listing_host):
+                    found.setdefault(url)
+            page_url = next((url for url in candidates if url and url not in visited), None)
+
+        links = list(found)[:self.config["max_links"]]
+        self.log(f"🔎 {source['url'][:70]}: {len(links)} enlaces en {len(visited)} páginas")
+        return links
+
+    async def crawl(self, sources: List[Dict]) -> List[Tuple[str, str]]:
+        """(url, fuente) de todas las fuentes, sin duplicados entre fuentes"""
+        async with create_http_client(max_connections=self.config["max_concurrency"]) as client:
+            per_source = await asyncio.gather(
+                *(self.crawl_source(client, source) for source in sources),
+                return_exceptions=True
+            )
+        discovered: Dict[str, str] = {}
+        for source, links in zip(sources, per_source):
+            if isinstance(links, Exception):
+                self.log(f"❌ Error rastreando {source['url'][:70]}: {links}")
+                continue
+            for url in links:
+                discovered.setdefault(url, source["url"])
+        return list(discovered.items())
+
+def discover_urls(sources: List[Dict] = None, only_new: bool = None,
+                  log: Callable[[str], None] = print) -> List[Tuple[str, str]]:
+    """
+    Rastrea las fuentes (por defecto LISTING_SOURCES) y devuelve (url, fuente)
+    Con only_new, omite las URLs ya exportadas en rastreos anteriores
+    """
+    config_sources, crawler_config = get_crawler_config()
+    if sources is None:
+        sources = config_sources
+    if only_new is None:
+        only_new = crawler_config["only_new"]
+    if not sources:
+        log("⚠️ No hay fuentes de listados configuradas (LISTING_SOURCES en config.py)")
+        return []
+
+    log(f"🔎 Rastreando {len(sources)} fuentes de listados...")
+    discovered = asyncio.run(ListingCrawler(crawler_config, log).crawl(sources))
+    if only_new:
+        seen = SeenUrls(get_cache_dir() / "crawler_seen.json")
+        known = len(discovered)
+        discovered = [(url, source) for url, source in discovered if seen.is_new(url)]
+        log(f"🆕 {len(discovered)} URLs nuevas de {known} encontradas")
+    return discovered
+
+def crawl_and_export(sources: List[Dict] = None, only_new: bool = None,
+                     log: Callable[[str], None] = print, **export_kwargs) -> List[Dict]:
+    """
+    Rastrea las fuentes y exporta las URLs encontradas con export_urls
+    Las URLs exportadas con éxito se recuerdan para el próximo rastreo
+    """
+    discovered = discover_urls(sources, only_new, log)
+    if not discovered:
+        return []
+    results = export_urls([url for url, _ in discovered], **export_kwargs)
+    remember_exported(discovered, results)
+    return results
+
+def remember_exported(discovered: List[Tuple[str, str]], results: List[Dict]):
+    """Recuerda las URLs rastreadas que se exportaron con éxito"""
+    sources = dict(discovered)
+    seen = SeenUrls(get_cache_dir() / "crawler_seen.json")
+    for result in results:
+        if result["status"] == "success" and result["url"] in sources:
+            seen.mark(result["url"], sources[result["url"]])
+    seen.save()
@@ -0,0 +1,161 @@
+# scripts/llm_engine.py
+"""
+Motor asíncrono de llamadas al LLM
+Envía a la vez los resúmenes y bloques de muchos documentos, limitado por
+cubetas de peticiones y tokens por minuto (RPM/TPM) en lugar de pausas
+fijas. OPENAI_BASE_URL permite apuntarlo a otro endpoint compatible, p. ej.
+scripts/mock_openai_server.py para probarlo sin gastar tokens.
+"""
+
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+# Valores por defecto si config.py no define LLM_CONFIG
+DEFAULT_LLM_CONFIG = {
+    "async": True,
+    "max_concurrency": 8,          # Llamadas en vuelo a la vez
+    "requests_per_minute": 500,    # Límite RPM de la cuenta
+    "tokens_per_minute": 30000,    # Límite TPM de la cuenta
+    "output_tokens": 1000,         # Tokens de respuesta que se reservan por llamada
+    "timeout": 120                 # Segundos máximos por llamada
+}
+
+# Caracteres por token para estimar el tamaño del prompt sin tokenizador
+CHARS_PER_TOKEN = 4
+
+def get_llm_config() -> Dict:
+    """Configuración del motor asíncrono desde config.py"""
+    import config
+    import importlib
+    importlib.reload(config)
+    llm_config = dict(DEFAULT_LLM_CONFIG)
+    llm_config.update(getattr(config, "LLM_CONFIG", {}))
+    return llm_config
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    return sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN + 4 * len(messages)
+
+class TokenBucket:
+    """
+    Cubeta que se rellena a ritmo constante hasta su capacidad
+    acquire() espera hasta que haya saldo; el saldo puede quedar negativo
+    con adjust() si el consumo real supera lo reservado
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = max(1.0, float(per_minute))
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # Una petición mayor que la cubeta esperaría para siempre
+        amount = min(float(amount), self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Devuelve (positivo) o cobra (negativo) la diferencia con lo reservado"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class LLMError(Exception):
+    """La llamada falló tras agotar los reintentos"""
+
+class AsyncLLMEngine:
+    """
+    Cliente AsyncOpenAI compartido con límite de concurrencia y de RPM/TPM
+
+    Cada llamada reserva una petición y los tokens estimados (prompt más
+    output_tokens) antes de salir; al volver se corrige con el uso real.
+    Los 429 y errores de servidor se reintentan con espera exponencial,
+    respetando Retry-After si el servidor lo envía.
+    """
+
+    def __init__(self, api_key: str, model: str, llm_config: Dict = None,
+                 base_url: Optional[str] = None, max_retries: int = 3):
+        from openai import AsyncOpenAI
+        self.config = dict(DEFAULT_LLM_CONFIG)
+        self.config.update(llm_config or {})
+        self.model = model
+        self.max_retries = max(1, max_retries)
+        # Los reintentos se hacen aquí, para pasar de nuevo por las cubetas
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url or None,
+                                  max_retries=0, timeout=self.config["timeout"])
+        self.requests = TokenBucket(self.config["requests_per_minute"])
+        self.tokens = TokenBucket(self.config["tokens_per_minute"])
+        self.in_flight = asyncio.Semaphore(max(1, self.config["max_concurrency"]))
+        self.stats = {"calls": 0, "retries": 0, "tokens": 0}
+
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Segundos de espera antes de reintentar, o None si no se reintenta"""
+        import openai
+        backoff = min(60.0, 2 ** attempt) * (0.5 + random.random())
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code != 429 and error.status_code < 500:
+                return None
+            try:
+                return float(error.response.headers.get("retry-after", ""))
+            except ValueError:
+                return backoff
+        # Sin conexión, tiempo agotado o JSON inválido: reintentar
+        if isinstance(error, (openai.APIConnectionError, ValueError)):
+            return backoff
+        return None
+
+    async def chat(self, messages: List[Dict], temperature: float = 0.3,
+                   json_mode: bool = False) -> str:
+        """Contenido de la respuesta (en json_mode, reintenta si no es JSON válido)"""
+        reserved = estimate_tokens(messages) + self.config["output_tokens"]
+        kwargs = {"model": self.model, "temperature": temperature, "messages": messages}
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+
+        for attempt in range(self.max_retries):
+            await self.requests.acquire()
+            await self.tokens.acquire(reserved)
+            response = None
+            try:
+                async with self.in_flight:
+                    response = await self.client.chat.completions.create(**kwargs)
+                content = response.choices[0].message.content or ""
+                used = getattr(response.usage, "total_tokens", None) or reserved
+                self.tokens.adjust(reserved - used)
+                self.stats["calls"] += 1
+                self.stats["tokens"] += used
+                if json_mode:
+                    json.loads(content)
+                return content
+            except Exception as e:
+                if response is None:
+                    # La llamada no llegó a consumir tokens
+                    self.tokens.adjust(reserved)
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == self.max_retries - 1:
+                    raise LLMError(str(e)) from e
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+        raise LLMError("sin reintentos")
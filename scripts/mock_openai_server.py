@@ -0,0 +1,149 @@
+# scripts/mock_openai_server.py
+"""
+Servidor local que imita /v1/chat/completions de OpenAI
+Sirve para probar el motor asíncrono (concurrencia, límites RPM, 429 y
+reintentos) sin gastar tokens:
+
+    python scripts/mock_openai_server.py --latency 1.5 --rpm 60
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python main.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockState:
+    """Contadores compartidos entre peticiones"""
+
+    def __init__(self, latency: float, rpm: int, fail_rate: float, window: float = 60.0):
+        self.latency = latency
+        self.rpm = rpm
+        self.window = window
+        self.fail_rate = fail_rate
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.in_flight = 0
+        self.peak = 0
+        self.served = 0
+        self.rejected = 0
+
+    def admit(self) -> float:
+        """
+        0 si la petición entra, o los segundos de Retry-After si supera rpm
+        (peticiones por ventana de window segundos, un minuto por defecto)
+        """
+        with self.lock:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > self.window:
+                self.recent.popleft()
+            if self.rpm and len(self.recent) >= self.rpm:
+                self.rejected += 1
+                return max(0.1, self.window - (now - self.recent[0]))
+            self.recent.append(now)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return 0
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.served += 1
+
+def fake_completion(request: dict) -> dict:
+    messages = request.get("messages", [])
+    prompt = "\n".join(m.get("content", "") for m in messages)
+    filename = re.search(r"Archivo: (.+)", prompt)
+    filename = filename.group(1).strip() if filename else "documento"
+    if request.get("response_format", {}).get("type") == "json_object":
+        content = json.dumps({"opportunities": [{
+            "title": f"Convocatoria de prueba ({filename})",
+            "summary": "Respuesta simulada por mock_openai_server.",
+            "sponsor": "Mock",
+            "deadline": "unknown",
+            "status": "open"
+        }]}, ensure_ascii=False)
+    else:
+        content = f"Resumen simulado de {filename}."
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-mock-{random.randint(0, 10**9)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send(400, {"error": {"message": "invalid json"}})
+                return
+
+            retry_after = state.admit()
+            if retry_after:
+                self._send(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests"}},
+                           {"Retry-After": f"{retry_after:.1f}"})
+                return
+            try:
+                time.sleep(state.latency * random.uniform(0.5, 1.5))
+                if random.random() < state.fail_rate:
+                    self._send(500, {"error": {"message": "Server error (mock)"}})
+                    return
+                self._send(200, fake_completion(request))
+            finally:
+                state.done()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local de la API de OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="Segundos medios por respuesta")
+    parser.add_argument("--rpm", type=int, default=0, help="Responder 429 por encima de estas peticiones/minuto")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fracción de respuestas 500")
+    args = parser.parse_args()
+
+    state = MockState(args.latency, args.rpm, args.fail_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"🧪 Mock de OpenAI en http://{args.host}:{args.port}/v1 (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n📊 {state.served} respuestas, {state.rejected} rechazadas con 429, "
+              f"máx. {state.peak} a la vez")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# scripts/pdf_backends.py
+"""
+Motores de extracción de texto de PDF
+pdfminer es la referencia (Python puro, siempre instalado); pypdfium2 y
+PyMuPDF son opcionales y mucho más rápidos. Se elige con PDF_TEXT_BACKEND
+en config.py y, si el motor elegido no está instalado, se usa pdfminer.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# Parámetros de maquetación de pdfminer (también forman parte de la clave de caché)
+PDF_LAPARAMS = {
+    "line_overlap": 0.5,
+    "char_margin": 2.0,
+    "line_margin": 0.5,
+    "word_margin": 0.1,
+    "boxes_flow": 0.5,
+    "detect_vertical": False,
+    "all_texts": False
+}
+
+DEFAULT_PDF_BACKEND = "pdfminer"
+
+def clean_pdf_text(text: str) -> str:
+    """Limpieza común: saltos de página, líneas en blanco y espacios repetidos"""
+    text = text.replace('\x0c', '\n')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+    return text.strip()
+
+class PdfBackend(ABC):
+    """
+    Interfaz de un motor: extract() devuelve el texto limpio del PDF, o None
+    si no se pudo leer (un error no debe guardarse en la caché);
+    iter_pages() entrega el texto en bruto página a página y lanza la
+    excepción si falla, para poder dejar de leer a mitad del documento
+    """
+
+    name = ""
+
+    @abstractmethod
+    def available(self) -> bool:
+        ...
+
+    @abstractmethod
+    def version(self) -> str:
+        ...
+
+    def params(self) -> Dict:
+        """Identifica el motor y su configuración para la clave de caché"""
+        return {"extractor": self.name, "version": self.version()}
+
+    @abstractmethod
+    def extract(self, filepath: Path) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def iter_pages(self, filepath: Path) -> Iterator[str]:
+        ...
+
+class PdfminerBackend(PdfBackend):
+    """Motor de referencia: pdfminer.six con LAParams ajustados"""
+
+    name = "pdfminer"
+
+    def available(self) -> bool:
+        try:
+            import pdfminer  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def version(self) -> str:
+        import pdfminer
+        return pdfminer.__version__
+
+    def params(self) -> Dict:
+        return {**super().params(), "laparams": PDF_LAPARAMS}
+
+    def extract(self, filepath: Path) -> Optional[str]:
+        from pdfminer.high_level import extract_text as pdf_extract_text
+        from pdfminer.layout import LAParams
+        try:
+            # Método 1: Con LAParams optimizado
+            text = pdf_extract_text(str(filepath), laparams=LAParams(**PDF_LAPARAMS))
+            if text and len(text) > 50:
+                return clean_pdf_text(text)
+
+            # Método 2: Sin LAParams como fallback
+            print("   ⚠️ Reintentando extracción básica...")
+            text = pdf_extract_text(str(filepath))
+            return text.strip() if text else ""
+        except Exception as e:
+            print(f"   ⚠️ Error en extracción: {e}")
+            return None
+
+    def iter_pages(self, filepath: Path) -> Iterator[str]:
+        # Lo mismo que hace extract_text, pero vaciando la salida en cada página
+        from io import StringIO
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        with open(filepath, 'rb') as f:
+            resources = PDFResourceManager(caching=True)
+            output = StringIO()
+            device = TextConverter(resources, output, laparams=LAParams(**PDF_LAPARAMS))
+            interpreter = PDFPageInterpreter(resources, device)
+            try:
+                for page in PDFPage.get_pages(f, caching=True):
+                    interpreter.process_page(page)
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
+            finally:
+                device.close()
+
+class PdfiumBackend(PdfBackend):
+    """pypdfium2: el motor de PDF de Chromium, capa de texto por página"""
+
+    name = "pdfium"
+
+    def available(self) -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def version(self) -> str:
+        import pypdfium2
+        return str(getattr(pypdfium2, "V_PYPDFIUM2", getattr(pypdfium2, "__version__", "?")))
+
+    def iter_pages(self, filepath: Path) -> Iterator[str]:
+        import pypdfium2 as pdfium
+        document = pdfium.PdfDocument(str(filepath))
+        try:
+            for page in document:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                yield text.replace('\r\n', '\n') + '\n\n'
+        finally:
+            document.close()
+
+    def extract(self, filepath: Path) -> Optional[str]:
+        try:
+            return clean_pdf_text("".join(self.iter_pages(filepath)))
+        except Exception as e:
+            print(f"   ⚠️ Error en extracción: {e}")
+            return None
+
+class PymupdfBackend(PdfBackend):
+    """PyMuPDF (MuPDF): el más rápido, con orden de lectura por bloques"""
+
+    name = "pymupdf"
+
+    def available(self) -> bool:
+        try:
+            import fitz  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def version(self) -> str:
+        import fitz
+        return str(getattr(fitz, "VersionBind", "?"))
+
+    def iter_pages(self, filepath: Path) -> Iterator[str]:
+        import fitz
+        with fitz.open(str(filepath)) as document:
+            for page in document:
+                yield page.get_text("text", sort=True) + '\n\n'
+
+    def extract(self, filepath: Path) -> Optional[str]:
+        try:
+            return clean_pdf_text("".join(self.iter_pages(filepath)))
+        except Exception as e:
+            print(f"   ⚠️ Error en extracción: {e}")
+            return None
+
+PDF_BACKENDS = {
+    backend.name: backend
+    for backend in (PdfminerBackend(), PdfiumBackend(), PymupdfBackend())
+}
+
+_warned = set()
+
+def get_pdf_backend(name: str = None) -> PdfBackend:
+    """Motor configurado (PDF_TEXT_BACKEND), o pdfminer si no está disponible"""
+    if name is None:
+        import config
+        import importlib
+        importlib.reload(config)
+        name = getattr(config, "PDF_TEXT_BACKEND", DEFAULT_PDF_BACKEND)
+    backend = PDF_BACKENDS.get((name or DEFAULT_PDF_BACKEND).lower())
+    if backend is None or not backend.available():
+        if name not in _warned:
+            _warned.add(name)
+            print(f"   ⚠️ Motor de PDF '{name}' no disponible, usando {DEFAULT_PDF_BACKEND}")
+        backend = PDF_BACKENDS[DEFAULT_PDF_BACKEND]
+    return backend
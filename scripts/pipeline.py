@@ -0,0 +1,168 @@
+# scripts/pipeline.py
+"""
+Pipeline URLs → PDFs → Análisis con etapas solapadas
+Cada PDF pasa a una cola acotada en cuanto se exporta y los workers de
+extracción lo analizan mientras el navegador sigue renderizando
+El texto se extrae en el pool de extraction_pool, con el mismo tiempo
+máximo por archivo que el análisis de carpetas. Con LLM_CONFIG["async"] el
+análisis usa el motor asíncrono (límites RPM/TPM) en lugar de los workers
+con RATE_LIMIT_DELAY
+"""
+
+import asyncio
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+from webpage_print_to_pdf import iter_export_urls
+from funding_pdf_extractor import (
+    get_config, analyze_document, analyze_document_async, create_llm_engine, save_results
+)
+from llm_engine import get_llm_config
+from extraction_pool import ExtractionPool
+
+# Valores por defecto si config.py no define PIPELINE_CONFIG
+DEFAULT_PIPELINE_CONFIG = {
+    "analysis_workers": 2,
+    "queue_size": 8
+}
+
+def get_pipeline_config() -> Dict:
+    """Obtiene la configuración del pipeline desde config.py, con valores por defecto"""
+    cfg = get_config()
+    pipeline_config = dict(DEFAULT_PIPELINE_CONFIG)
+    pipeline_config.update(getattr(cfg, "PIPELINE_CONFIG", {}))
+    return pipeline_config
+
+def run_pipeline(
+    urls: List[str],
+    output_folder: Path = None,
+    analysis_workers: int = None,
+    queue_size: int = None,
+    log: Callable[[str], None] = print
+) -> Dict:
+    """
+    Exporta las URLs y analiza cada PDF en cuanto está listo
+    Solo se analizan los documentos producidos en esta ejecución; el JSON
+    final los lista en el orden de las URLs
+    """
+    pipeline_config = get_pipeline_config()
+    if analysis_workers is None:
+        analysis_workers = pipeline_config["analysis_workers"]
+    if queue_size is None:
+        queue_size = pipeline_config["queue_size"]
+
+    documents = queue.Queue(maxsize=max(1, queue_size))
+    analyzed: Dict[int, Dict] = {}
+    analyzed_lock = threading.Lock()
+    # Extracción en el pool de procesos, con el tiempo máximo por archivo
+    extractor = ExtractionPool()
+
+    def failed(pdf_path: Path, error: Exception) -> Dict:
+        log(f"❌ Error analizando {pdf_path.name}: {error}")
+        return {
+            "filename": pdf_path.name,
+            "summary": f"Error en el análisis: {error}",
+            "opportunities_count": 0,
+            "opportunities": []
+        }
+
+    def store(index: int, pdf_path: Path, result: Dict):
+        with analyzed_lock:
+            analyzed[index] = result
+        log(f"🤖 Analizado {pdf_path.name}: {result['opportunities_count']} oportunidades")
+
+    def analysis_worker():
+        while True:
+            item = documents.get()
+            if item is None:
+                break
+            index, pdf_path = item
+            try:
+                result = analyze_document(pdf_path, extractor.submit(pdf_path).result())
+            except Exception as e:
+                result = failed(pdf_path, e)
+            store(index, pdf_path, result)
+
+    async def analyze_queue_async():
+        # Un solo consumidor: cada documento se analiza en cuanto sale de la
+        # cola y el motor reparte la concurrencia entre todos. Solo se sacan
+        # de la cola queue_size documentos a la vez, para que la cola siga
+        # frenando la exportación
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(max(1, queue_size))
+
+        async def analyze(engine, index: int, pdf_path: Path):
+            try:
+                document = await asyncio.wrap_future(extractor.submit(pdf_path))
+                result = await analyze_document_async(engine, pdf_path, document)
+            except Exception as e:
+                result = failed(pdf_path, e)
+            finally:
+                slots.release()
+            store(index, pdf_path, result)
+
+        async with create_llm_engine() as engine:
+            tasks = []
+            try:
+                while True:
+                    await slots.acquire()
+                    item = await loop.run_in_executor(None, documents.get)
+                    if item is None:
+                        break
+                    tasks.append(asyncio.create_task(analyze(engine, *item)))
+            finally:
+                # Los documentos ya sacados de la cola terminan y guardan su resultado
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def async_analysis_worker():
+        try:
+            asyncio.run(analyze_queue_async())
+        except Exception as e:
+            log(f"❌ Motor asíncrono detenido: {e}")
+            # Seguir vaciando la cola para que la exportación no se bloquee
+            while True:
+                item = documents.get()
+                if item is None:
+                    break
+                store(item[0], item[1], failed(item[1], e))
+
+    if get_llm_config()["async"]:
+        workers = [threading.Thread(target=async_analysis_worker, name="analisis-async", daemon=True)]
+    else:
+        workers = [
+            threading.Thread(target=analysis_worker, name=f"analisis-{n}", daemon=True)
+            for n in range(max(1, analysis_workers))
+        ]
+    for worker in workers:
+        worker.start()
+
+    exported = 0
+    errors = []
+    try:
+        for result in iter_export_urls(urls):
+            if result["status"] == "success":
+                exported += 1
+                log(f"📄 [{exported}] Exportado {result['filename']}, en cola para análisis")
+                # put() bloquea si la cola está llena: el análisis marca el ritmo
+                documents.put((result["index"], Path(result["filepath"])))
+            else:
+                errors.append(result)
+                log(f"❌ {result['url'][:60]}: {result['message'][:80]}")
+    finally:
+        for _ in workers:
+            documents.put(None)
+        for worker in workers:
+            worker.join()
+        extractor.close()
+
+    if exported == 0:
+        return {"error": "No PDFs exported", "export_errors": errors}
+
+    ordered = [analyzed[index] for index in sorted(analyzed)]
+    json_output = save_results(ordered, output_folder)
+    json_output["export_errors"] = errors
+    return json_output
@@ -0,0 +1,156 @@
+# scripts/sharded_export.py
+"""
+Exportación repartida en varios procesos, cada uno con su propio Chromium
+Una página pesada solo frena a su proceso y el render usa varios núcleos
+"""
+
+import asyncio
+import multiprocessing
+import queue
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent))
+
+from webpage_print_to_pdf import get_domain, get_export_config
+
+# Segundos entre comprobaciones del estado de los procesos
+POLL_INTERVAL = 1.0
+
+Job = Tuple[int, str]
+
+def shard_by_domain(urls: List[str], workers: int) -> List[List[Job]]:
+    """
+    Reparte las URLs en fragmentos sin partir ningún dominio
+    Así la cortesía por dominio la sigue aplicando un único proceso.
+    Los dominios más grandes se asignan primero al fragmento más ligero.
+    """
+    by_domain: Dict[str, List[Job]] = defaultdict(list)
+    for index, url in enumerate(urls, 1):
+        by_domain[get_domain(url)].append((index, url))
+
+    shards: List[List[Job]] = [[] for _ in range(max(1, workers))]
+    for jobs in sorted(by_domain.values(), key=len, reverse=True):
+        min(shards, key=len).extend(jobs)
+    return [sorted(shard) for shard in shards if shard]
+
+def _worker_main(worker_id: int, jobs: List[Job], total: int, results, kwargs: Dict):
+    """Punto de entrada de cada proceso: exporta su fragmento con su navegador"""
+    from webpage_print_to_pdf import iter_export_results
+
+    async def run():
+        indices = [index for index, _ in jobs]
+        urls = [url for _, url in jobs]
+        async for result in iter_export_results(urls, indices=indices, total=total,
+                                              profile_slot=worker_id, **kwargs):
+            result["worker"] = worker_id
+            results.put(result)
+
+    asyncio.run(run())
+
+def _error_result(index: int, url: str, message: str) -> Dict:
+    return {
+        "index": index,
+        "url": url,
+        "filename": None,
+        "filepath": None,
+        "status": "error",
+        "cache": "miss",
+        "error_type": "render_crash",
+        "message": message
+    }
+
+def iter_export_sharded(
+    urls: List[str],
+    workers: int = None,
+    max_restarts: int = None,
+    **kwargs
+) -> Iterator[Dict]:
+    """
+    Exporta las URLs con varios procesos y entrega cada resultado al llegar
+    Si un proceso muere, solo se vuelven a encolar sus URLs pendientes en un
+    proceso nuevo (hasta max_restarts veces por fragmento)
+    """
+    export_config = get_export_config()
+    if workers is None:
+        workers = export_config["workers"]
+    if max_restarts is None:
+        max_restarts = export_config["worker_restarts"]
+
+    # spawn: los procesos no heredan hilos (GUI, servicio de navegador)
+    mp = multiprocessing.get_context("spawn")
+    results = mp.Queue()
+    shards = shard_by_domain(urls, workers)
+    pending: Dict[int, Dict[int, str]] = {}
+    restarts: Dict[int, int] = {}
+    processes = {}
+
+    def launch(worker_id: int):
+        jobs = sorted(pending[worker_id].items())
+        process = mp.Process(
+            target=_worker_main,
+            args=(worker_id, jobs, len(urls), results, kwargs),
+            name=f"exportador-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        processes[worker_id] = process
+
+    # Un mismo identificador de lote en las métricas de todos los procesos
+    kwargs.setdefault("metrics_batch", datetime.now().strftime("%Y%m%d_%H%M%S"))
+    print(f"🧩 Repartiendo {len(urls)} URLs en {len(shards)} procesos")
+    for worker_id, shard in enumerate(shards):
+        pending[worker_id] = dict(shard)
+        restarts[worker_id] = 0
+        launch(worker_id)
+
+    def receive(timeout: float):
+        result = results.get(timeout=timeout)
+        pending[result["worker"]].pop(result["index"], None)
+        return result
+
+    try:
+        while processes:
+            try:
+                yield receive(POLL_INTERVAL)
+                continue
+            except queue.Empty:
+                pass
+
+            for worker_id, process in list(processes.items()):
+                if process.is_alive():
+                    continue
+                # Recoger lo que el proceso dejó en la cola antes de morir
+                while True:
+                    try:
+                        yield receive(0.5)
+                    except queue.Empty:
+                        break
+                del processes[worker_id]
+
+                left = pending[worker_id]
+                if not left:
+                    continue
+                if restarts[worker_id] < max_restarts:
+                    restarts[worker_id] += 1
+                    print(f"⚠️ Proceso {worker_id} terminó (código {process.exitcode}), "
+                          f"reencolando {len(left)} URLs")
+                    launch(worker_id)
+                else:
+                    for index, url in sorted(left.items()):
+                        yield _error_result(index, url, "El proceso de exportación falló repetidamente")
+                    left.clear()
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+
+def export_urls_sharded(urls: List[str], **kwargs) -> List[Dict]:
+    """
+    Versión en lista de iter_export_sharded, en el orden de las URLs
+    (mismo formato que export_urls)
+    """
+    results = list(iter_export_sharded(urls, **kwargs))
+    return sorted(results, key=lambda r: r["index"])
@@ -0,0 +1,100 @@
+# scripts/sidecar.py
+"""
+Archivos de texto "sidecar" junto a cada PDF exportado
+El exportador guarda el texto del DOM ya renderizado y el extractor lo usa
+en lugar de volver a parsear el PDF con pdfminer
+"""
+
+import glob
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SIDECAR_SUFFIX = ".texto.json"
+
+# Máximo de enlaces que se añaden al texto para el análisis
+MAX_LINKS_IN_TEXT = 50
+
+# Marca en el nombre de los anexos descargados junto a un documento
+# (convocatoria_3.pdf -> convocatoria_3__anexo1_TdR.pdf)
+ATTACHMENT_MARKER = "__anexo"
+
+def sidecar_path(pdf_path: Path) -> Path:
+    """Ruta del sidecar de un PDF (documento_1.pdf -> documento_1.texto.json)"""
+    return pdf_path.with_name(pdf_path.stem + SIDECAR_SUFFIX)
+
+def attachment_path(doc_path: Path, number: int, name: str) -> Path:
+    """Ruta de un anexo junto al documento del que procede"""
+    return doc_path.with_name(f"{doc_path.stem}{ATTACHMENT_MARKER}{number}_{name}")
+
+def is_attachment(path: Path) -> bool:
+    return ATTACHMENT_MARKER in path.stem
+
+def find_attachments(doc_path: Path) -> List[Path]:
+    """Anexos guardados junto a un documento, en orden de descarga"""
+    # Los títulos pueden traer [ ] u otros comodines de glob
+    pattern = f"{glob.escape(doc_path.stem)}{ATTACHMENT_MARKER}*"
+    found = [p for p in doc_path.parent.glob(pattern)
+             if p.suffix.lower() in ('.pdf', '.docx') and not p.name.endswith('.part')]
+
+    def number(path: Path) -> int:
+        digits = path.stem[len(doc_path.stem) + len(ATTACHMENT_MARKER):].split('_')[0]
+        return int(digits) if digits.isdigit() else 0
+    return sorted(found, key=number)
+
+def write_sidecar(pdf_path: Path, url: str, capture: Dict, attachments: List[Dict] = None) -> Path:
+    """
+    Guarda el texto capturado del DOM junto al PDF
+    Registra el tamaño del PDF para detectar sidecars desactualizados
+    """
+    data = {
+        "url": url,
+        "pdf_file": pdf_path.name,
+        "pdf_size": pdf_path.stat().st_size,
+        "title": capture.get("title", ""),
+        "text": capture.get("text", ""),
+        "headings": capture.get("headings", []),
+        "links": capture.get("links", []),
+        "emails": capture.get("emails", []),
+        "attachments": attachments or []
+    }
+    path = sidecar_path(pdf_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+def read_sidecar(pdf_path: Path) -> Optional[Dict]:
+    """
+    Lee el sidecar de un PDF si existe y corresponde a ese mismo PDF
+    """
+    path = sidecar_path(pdf_path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return None
+    if data.get("pdf_size") != pdf_path.stat().st_size:
+        return None
+    return data
+
+def sidecar_to_text(data: Dict) -> str:
+    """
+    Compone el texto para el análisis a partir de un sidecar
+    La URL de origen y los correos van explícitos para la extracción por regex
+    """
+    parts = []
+    if data.get("title"):
+        parts.append(data["title"])
+    if data.get("url"):
+        parts.append(f"Fuente: {data['url']}")
+    parts.append(data.get("text", ""))
+    if data.get("emails"):
+        parts.append("Contacto: " + ", ".join(data["emails"]))
+    links = data.get("links", [])[:MAX_LINKS_IN_TEXT]
+    if links:
+        parts.append("Enlaces:\n" + "\n".join(
+            f"- {link.get('text', '').strip()} {link['href']}".strip() for link in links
+        ))
+    return "\n\n".join(part for part in parts if part).strip()
@@ -0,0 +1,76 @@
+# scripts/storage_state.py
+"""
+Estado del navegador (cookies y localStorage) persistido por dominio
+Las visitas repetidas a un sitio llegan con el consentimiento de cookies
+ya dado y con las sesiones que el sitio haya guardado
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+from urllib.parse import urlparse
+
+# Días que se reutiliza el estado de un dominio sin volver a visitarlo
+STORAGE_TTL_DAYS = 30
+
+def host_matches(host: str, domain: str) -> bool:
+    """True si host (p. ej. '.www.undp.org') pertenece al dominio 'undp.org'"""
+    host = host.lstrip('.').lower()
+    return host == domain or host.endswith('.' + domain)
+
+class DomainStorageStore:
+    """
+    Un archivo de storage_state de Playwright por dominio
+
+    Cada dominio tiene su propio archivo, así los procesos de exportación
+    (que nunca comparten dominio) no se pisan al guardar.
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def path(self, domain: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in '.-' else '_' for c in domain)
+        return self.folder / f"{safe}.json"
+
+    def load(self, domains: Iterable[str]) -> Dict:
+        """
+        Une en un solo storage_state los estados guardados de los dominios
+        Descarta archivos caducados y cookies ya expiradas
+        """
+        now = time.time()
+        cookies: List[Dict] = []
+        origins: List[Dict] = []
+        for domain in sorted(set(domains)):
+            path = self.path(domain)
+            if not path.exists() or now - path.stat().st_mtime > STORAGE_TTL_DAYS * 86400:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Estado de {domain} ilegible, se ignora: {e}")
+                continue
+            cookies.extend(c for c in state.get("cookies", [])
+                           if c.get("expires", -1) == -1 or c["expires"] > now)
+            origins.extend(state.get("origins", []))
+        return {"cookies": cookies, "origins": origins}
+
+    def save(self, state: Dict, domains: Iterable[str]):
+        """Guarda, para cada dominio visitado, su parte del storage_state"""
+        for domain in set(domains):
+            cookies = [c for c in state.get("cookies", []) if host_matches(c.get("domain", ""), domain)]
+            origins = [o for o in state.get("origins", [])
+                       if host_matches(urlparse(o.get("origin", "")).hostname or "", domain)]
+            if not cookies and not origins:
+                continue
+            path = self.path(domain)
+            tmp = path.with_suffix('.tmp')
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({"cookies": cookies, "origins": origins}, f, ensure_ascii=False, indent=2)
+                tmp.replace(path)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el estado de {domain}: {e}")
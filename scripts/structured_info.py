@@ -0,0 +1,130 @@
+# scripts/structured_info.py
+"""
+Extracción con regex de deadline, contacto, referencia, país y enlace
+Sin dependencias de OpenAI, para poder usarse también al leer el PDF por
+páginas en los procesos de extracción
+"""
+
+import re
+from typing import Dict, Optional
+
+def extract_deadline_aggressive(text: str) -> Optional[str]:
+    """Extracción agresiva de deadline - optimizada para UNDP"""
+    
+    # Patrón 1: "17-Oct-25 @ 01:59 AM" (formato UNDP típico)
+    pattern1 = r'(\d{1,2})-([A-Z][a-z]{2})-(\d{2})\s*@\s*(\d{1,2}):(\d{2})\s*(AM|PM)'
+    match = re.search(pattern1, text, re.IGNORECASE)
+    if match:
+        day, month_str, year, hour, minute, ampm = match.groups()
+        
+        months = {
+            'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
+            'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
+            'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
+        }
+        month = months.get(month_str.lower()[:3], '01')
+        full_year = f"20{year}"
+        deadline = f"{full_year}-{month}-{day.zfill(2)}"
+        return deadline
+    
+    # Patrón 2: Buscar "DEADLINE" y fecha cercana
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if 'deadline' in line.lower():
+            context = '\n'.join(lines[i:min(i+3, len(lines))])
+            
+            date_patterns = [
+                r'(\d{1,2})-([A-Z][a-z]{2})-(\d{2,4})',
+                r'(\d{1,2})/(\d{1,2})/(\d{2,4})',
+                r'(\d{4})-(\d{2})-(\d{2})'
+            ]
+            
+            for pattern in date_patterns:
+                match = re.search(pattern, context)
+                if match:
+                    parts = match.groups()
+                    if len(parts) == 3:
+                        try:
+                            if '-' in match.group(0) and match.group(0)[2].isalpha():
+                                day, month_str, year = parts
+                                months = {
+                                    'jan': '01', 'feb': '02', 'mar': '03', 'apr': '04',
+                                    'may': '05', 'jun': '06', 'jul': '07', 'aug': '08',
+                                    'sep': '09', 'oct': '10', 'nov': '11', 'dec': '12'
+                                }
+                                month = months.get(month_str.lower()[:3], '01')
+                                full_year = f"20{year}" if len(year) == 2 else year
+                                return f"{full_year}-{month}-{day.zfill(2)}"
+                        except:
+                            pass
+    
+    return None
+
+def extract_contact_aggressive(text: str) -> Optional[str]:
+    """Extracción agresiva de email de contacto"""
+    
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+    if emails:
+        # Priorizar emails de UNDP
+        for email in emails:
+            if 'undp' in email.lower():
+                return email
+        return emails[0]
+    
+    return None
+
+def extract_reference_number(text: str) -> Optional[str]:
+    """Extrae número de referencia formato UNDP"""
+    pattern = r'(UNDP-[A-Z]{3}-\d{5})'
+    match = re.search(pattern, text, re.IGNORECASE)
+    if match:
+        return match.group(1).upper()
+    return None
+
+def extract_structured_info(text: str, verbose: bool = True) -> Dict[str, str]:
+    """Extracción estructurada con regex (complementa a GPT)"""
+    info = {}
+    
+    # Deadline
+    deadline = extract_deadline_aggressive(text)
+    if deadline:
+        info['deadline'] = deadline
+        if verbose:
+            print(f"      🎯 Deadline regex: {deadline}")
+    
+    # Contact
+    contact = extract_contact_aggressive(text)
+    if contact:
+        info['contact'] = contact
+        if verbose:
+            print(f"      🎯 Contact regex: {contact}")
+    
+    # Reference
+    ref = extract_reference_number(text)
+    if ref:
+        info['reference'] = ref
+        if verbose:
+            print(f"      🎯 Referencia: {ref}")
+    
+    # Sponsor
+    if 'UNDP' in text or 'undp' in text.lower():
+        info['sponsor'] = 'UNDP'
+    
+    # País y región
+    text_upper = text.upper()
+    if 'EL SALVADOR' in text_upper or 'UNDP-SLV' in text:
+        info['country'] = 'El Salvador'
+        info['region'] = 'América Latina'
+    elif 'GUATEMALA' in text_upper or 'UNDP-GTM' in text:
+        info['country'] = 'Guatemala'
+        info['region'] = 'América Latina'
+    elif 'HONDURAS' in text_upper or 'UNDP-HND' in text:
+        info['country'] = 'Honduras'
+        info['region'] = 'América Latina'
+    
+    # URLs
+    urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]+', text)
+    if urls:
+        info['link'] = urls[0]
+    
+    return info
@@ -0,0 +1,94 @@
+# scripts/text_cache.py
+"""
+Caché en disco del texto extraído de los documentos
+La clave es el hash del contenido del archivo más los parámetros de
+extracción, así un PDF sin cambios no se vuelve a parsear aunque cambie de
+nombre, y cambiar los parámetros invalida la caché sola
+"""
+
+import gzip
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+# Sube este número si cambia la limpieza del texto extraído
+TEXT_CACHE_VERSION = 1
+
+# Valores por defecto si config.py no define TEXT_CACHE_CONFIG
+DEFAULT_TEXT_CACHE_CONFIG = {
+    "enabled": True,
+    "compress": True
+}
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class TextCache:
+    """
+    Un archivo por entrada (texto/<ab>/<clave>.txt[.gz]); se escribe a un
+    temporal y se renombra, así varios procesos pueden compartir la caché
+    """
+
+    def __init__(self, folder: Path, compress: bool = True):
+        self.folder = folder
+        self.compress = compress
+
+    def key(self, path: Path, params: Dict) -> str:
+        params_id = json.dumps({"version": TEXT_CACHE_VERSION, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{file_sha256(path)}:{params_id}".encode('utf-8')).hexdigest()
+
+    def _entry(self, key: str, compressed: bool) -> Path:
+        return self.folder / key[:2] / f"{key}.txt{'.gz' if compressed else ''}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Texto guardado para la clave (comprimido o no), o None"""
+        for compressed in (True, False):
+            entry = self._entry(key, compressed)
+            if not entry.exists():
+                continue
+            try:
+                if compressed:
+                    with gzip.open(entry, 'rt', encoding='utf-8') as f:
+                        return f.read()
+                return entry.read_text(encoding='utf-8')
+            except Exception:
+                entry.unlink(missing_ok=True)
+        return None
+
+    def put(self, key: str, text: str):
+        entry = self._entry(key, self.compress)
+        tmp = entry.with_name(entry.name + '.tmp')
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            if self.compress:
+                with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                    f.write(text)
+            else:
+                tmp.write_text(text, encoding='utf-8')
+            tmp.replace(entry)
+        except Exception as e:
+            print(f"   ⚠️ No se pudo guardar el texto en caché: {e}")
+            tmp.unlink(missing_ok=True)
+
+_default_cache = None
+
+def get_text_cache() -> Optional[TextCache]:
+    """Caché de texto configurada (None si está desactivada)"""
+    global _default_cache
+    if _default_cache is None:
+        import config
+        import importlib
+        importlib.reload(config)
+        cache_config = dict(DEFAULT_TEXT_CACHE_CONFIG)
+        cache_config.update(getattr(config, "TEXT_CACHE_CONFIG", {}))
+        if not cache_config["enabled"]:
+            _default_cache = False
+        else:
+            cache_dir = Path(getattr(config, "CACHE_DIR", Path(config.BASE_DIR) / ".cache"))
+            _default_cache = TextCache(cache_dir / "texto", compress=cache_config["compress"])
+    return _default_cache or None
@@ -0,0 +1,208 @@
+# scripts/text_focus.py
+"""
+Preparación del texto para el análisis: limpieza, prioridad por palabras
+clave y división en bloques
+Incluye una versión por páginas que deja de leer el PDF en cuanto los
+bloques que se van a analizar están completos (MAX_CHUNKS_PER_DOC)
+
+La versión por páginas no da exactamente el mismo resultado que limpiar y
+filtrar el texto completo:
+  - las páginas que no se llegan a leer no aportan nada, ni siquiera a la
+    búsqueda con regex de deadline, contacto o referencia
+  - la regex se aplica a cada tramo leído y gana el primer valor en el orden
+    del documento; con el texto completo algunos campos tienen prioridad
+    fija (p. ej. el país)
+  - los párrafos vacíos o partidos entre páginas pueden cortar los bloques
+    en otro sitio
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Palabras del inicio del documento que usa el resumen
+SUMMARY_WORDS = 2000
+
+# Párrafos sin palabras clave que keyword_focus añade a los relevantes
+FOCUS_EXTRA_PARAGRAPHS = 5
+
+# Final de texto que clean_and_structure_text uniría con el párrafo siguiente
+_MARKER_END = re.compile(r'(DEADLINE|CONTACT|REFERENCE\s+NUMBER)[\s:]*$', re.IGNORECASE)
+
+def get_config():
+    """Obtiene la configuración actualizada"""
+    import config
+    import importlib
+    importlib.reload(config)
+    return config
+
+def clean_and_structure_text(text: str) -> str:
+    """
+    Limpia y marca secciones importantes del texto
+    Aplicarla dos veces no vuelve a marcar lo ya marcado
+    """
+    if not text:
+        return ""
+
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+
+    # Marcar secciones críticas con emojis para que GPT las identifique mejor
+    text = re.sub(r'(?<!⏰ )(DEADLINE[\s:]*)', r'\n\n⏰ DEADLINE CRÍTICO: ', text, flags=re.IGNORECASE)
+    text = re.sub(r'(?<!📧 )(CONTACT[\s:]*)', r'\n\n📧 CONTACTO CRÍTICO: ', text, flags=re.IGNORECASE)
+    text = re.sub(r'(REFERENCE\s+NUMBER[\s:]*)', r'\n\n🔢 REFERENCIA: ', text, flags=re.IGNORECASE)
+    text = re.sub(r'(?<!EMAIL: )(\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)', r'\n📧 EMAIL: \1', text)
+
+    return text
+
+def is_relevant(paragraph: str, keywords: List[str]) -> bool:
+    paragraph = paragraph.lower()
+    return any(kw.lower() in paragraph for kw in keywords)
+
+def keyword_focus(text: str, keywords: List[str]) -> str:
+    """Prioriza párrafos con palabras clave"""
+    if not text:
+        return ""
+
+    paragraphs = re.split(r'\n{2,}', text)
+    relevant = []
+    other = []
+
+    for para in paragraphs:
+        if is_relevant(para, keywords):
+            relevant.append(para)
+        else:
+            other.append(para)
+
+    if relevant:
+        focused = '\n\n'.join(relevant)
+        cfg = get_config()
+        if len(focused) < cfg.CHUNK_SIZE * 3:
+            focused += '\n\n' + '\n\n'.join(other[:FOCUS_EXTRA_PARAGRAPHS])
+        return focused
+
+    return text
+
+def chunk_text(text: str, chunk_size: int, overlap: int, max_chunks: int) -> List[str]:
+    """Divide texto en chunks con overlap"""
+    if not text:
+        return []
+
+    words = text.split()
+    if len(words) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = min(start + chunk_size, len(words))
+        chunks.append(' '.join(words[start:end]))
+        if end >= len(words):
+            break
+        start = end - overlap
+
+    return chunks[:max_chunks]
+
+def chunk_budget(chunk_size: int, overlap: int, max_chunks: int) -> int:
+    """Palabras que caben en max_chunks bloques de chunk_text"""
+    step = max(1, chunk_size - overlap)
+    return chunk_size + step * max(0, max_chunks - 1)
+
+def get_stream_focus() -> Optional[Dict]:
+    """
+    Parámetros de la lectura por páginas desde config.py, o None si está
+    desactivada (EXTRACTION_CONFIG["stream_pages"])
+    """
+    cfg = get_config()
+    if not getattr(cfg, "EXTRACTION_CONFIG", {}).get("stream_pages", True):
+        return None
+    return {
+        "keywords": list(cfg.KEYWORDS),
+        "budget": chunk_budget(cfg.CHUNK_SIZE, cfg.CHUNK_OVERLAP, cfg.MAX_CHUNKS_PER_DOC)
+    }
+
+class PageFocus:
+    """
+    Consume el texto página a página y conserva, en el orden del documento,
+    solo lo que keyword_focus, chunk_text y el resumen pueden llegar a usar:
+      - el inicio del documento (resumen y bloques si no hay palabras clave)
+      - los párrafos con palabras clave hasta llenar el presupuesto de bloques
+      - los primeros párrafos sin palabras clave que keyword_focus añade
+    Cuando los párrafos relevantes llenan el presupuesto, full es True y el
+    resto del PDF ya no cambiaría los bloques: se puede dejar de leer.
+    Con scan, cada tramo leído (también lo que se descarta) pasa por esa
+    función y sus datos se acumulan en info, ganando el primero encontrado.
+    """
+
+    def __init__(self, keywords: List[str], budget: int,
+                 scan: Optional[Callable[[str], Dict[str, str]]] = None):
+        self.keywords = keywords
+        self.budget = budget
+        self.scan = scan
+        self.info: Dict[str, str] = {}
+        self.head_words = max(budget, SUMMARY_WORDS)
+        self.kept: List[str] = []
+        self.kept_words = 0
+        self.relevant_words = 0
+        self.other_kept = 0
+        self.pages = 0
+        self._pending = ""
+
+    @property
+    def full(self) -> bool:
+        return self.relevant_words >= self.budget
+
+    def feed(self, page_text: str):
+        """Añade una página; el párrafo que queda abierto espera a la siguiente"""
+        self.pages += 1
+        self._pending += page_text.replace('\x0c', '\n')
+        # Cortar en el último salto de párrafo que la limpieza no va a unir
+        for separator in reversed(list(re.finditer(r'\n{2,}', self._pending))):
+            done = self._pending[:separator.start()]
+            if not _MARKER_END.search(done[-60:]):
+                self._pending = self._pending[separator.end():]
+                self._consume(done)
+                return
+
+    def _consume(self, text: str):
+        text = clean_and_structure_text(text)
+        if self.scan:
+            for key, value in self.scan(text).items():
+                self.info.setdefault(key, value)
+        for para in re.split(r'\n{2,}', text):
+            if not para.strip():
+                continue
+            words = len(para.split())
+            relevant = is_relevant(para, self.keywords)
+            if relevant and self.relevant_words < self.budget:
+                self.relevant_words += words
+            elif not (self.kept_words < self.head_words
+                      or (not relevant and self.other_kept < FOCUS_EXTRA_PARAGRAPHS)):
+                continue
+            if not relevant:
+                self.other_kept += 1
+            self.kept.append(para)
+            self.kept_words += words
+
+    def text(self) -> str:
+        """Texto conservado (ya limpio), en el orden del documento"""
+        if self._pending:
+            self._consume(self._pending)
+            self._pending = ""
+        return '\n\n'.join(self.kept).strip()
+
+def focus_pages(pages: Iterable[str], keywords: List[str], budget: int,
+                scan: Optional[Callable[[str], Dict[str, str]]] = None) -> Dict:
+    """
+    Lee páginas hasta llenar el presupuesto de bloques y devuelve el texto
+    conservado, los datos de scan en las páginas leídas, cuántas se leyeron
+    y si se paró antes del final
+    """
+    focus = PageFocus(keywords, budget, scan)
+    stopped = False
+    for page_text in pages:
+        focus.feed(page_text)
+        if focus.full:
+            stopped = True
+            break
+    text = focus.text()
+    return {"text": text, "info": focus.info, "pages": focus.pages, "stopped": stopped}
@@ -5,14 +5,353 @@ Versión mejorada con anti-detección y RUTAS DINÁMICAS
 """
 
 import re
+import json
+import time
+import hashlib
 import asyncio
 import random
 from pathlib import Path
-from typing import List, Dict, Optional
+from datetime import datetime
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import AsyncIterator, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright
 import sys
 sys.path.append(str(Path(__file__).parent))
 
+from browser_service import BROWSER_LAUNCH_ARGS, get_browser_service, launch_browser, iterate_in_thread
+from json_store import JsonStore
+from domain_profiles import DomainProfileStore
+from export_retry import (
+    ANTI_BOT, FAILURE_MESSAGES, ExportError, RetryScheduler, classify_failure, classify_status
+)
+from sidecar import write_sidecar, sidecar_path, find_attachments
+from attachments import AttachmentHarvester
+from html_text import html_to_capture, has_static_content
+from context_pool import ContextPool
+from storage_state import DomainStorageStore
+from export_metrics import MetricsLog, PhaseTimer, file_metrics
+from http_fetch import (
+    create_http_client, probe_url, is_pdf_response, filename_from_headers, download_file, fetch_html
+)
+
+# Valores por defecto si config.py no define EXPORT_CONFIG
+DEFAULT_EXPORT_CONFIG = {
+    "max_concurrent_pages": 4,
+    "per_domain_concurrency": 1,
+    "per_domain_delay": (3, 7),
+    "use_browser_service": True,
+    "headless": True,
+    "block_resources": ["media", "websocket", "eventsource", "manifest", "texttrack"],
+    "block_trackers": True,
+    "reuse_unchanged": True,
+    "write_text_sidecar": True,
+    "learn_domain_timings": True,
+    "workers": 1,
+    "worker_restarts": 2,
+    "retry_attempts": 3,
+    "retry_base_delay": 5,
+    "retry_max_delay": 60,
+    "retry_budget": 300,
+    "context_max_pages": 50,
+    "context_max_rss_mb": 2048,
+    "persist_storage": True,
+    "browser_profile": False,
+    "static_fetch": True,
+    "static_min_text": 1500,
+    "scroll_max_pixels": 30000,
+    "scroll_max_ms": 15000,
+    "scroll_stall_rounds": 3,
+    "harvest_attachments": True,
+    "attachment_per_host": 2,
+    "attachment_max_mb": 20,
+    "attachment_max_files": 8
+}
+
+# Perfiles iniciales de sitios conocidos. wait_time y needs_scroll solo se usan
+# hasta que DomainProfileStore tiene observaciones suficientes del dominio.
+# block_resources reemplaza la lista por defecto de EXPORT_CONFIG para ese dominio
+SEED_DOMAIN_PROFILES = {
+    'undp.org': {'wait_time': 8000, 'needs_scroll': True,
+                 'block_resources': ["media", "font", "image", "websocket", "manifest"]},
+    'unicef.org': {'wait_time': 8000, 'needs_scroll': True,
+                   'block_resources': ["media", "font", "image", "websocket", "manifest"]},
+    'iom.int': {'wait_time': 7000, 'needs_scroll': True},
+    'glasswing.org': {'wait_time': 6000, 'needs_scroll': True}
+}
+
+# Milisegundos sin mutaciones del DOM para considerar la página estable
+READINESS_QUIET_MS = 500
+# Tope de espera tras el scroll de contenido diferido
+LAZY_SETTLE_MAX_MS = 3000
+
+# Espera a que el DOM deje de mutar y las imágenes no diferidas terminen de cargar.
+# Devuelve además si hay contenido diferido (lazy) que justifique hacer scroll.
+READINESS_SCRIPT = '''
+    async ({quietMs, maxMs}) => {
+        const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
+        const start = performance.now();
+        let lastMutation = start;
+        const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+        observer.observe(document, {childList: true, subtree: true, characterData: true});
+        
+        const pendingImages = () => Array.from(document.images)
+            .filter(img => !img.complete && img.loading !== 'lazy').length;
+        
+        let settled = false;
+        try {
+            while (performance.now() - start < maxMs) {
+                if (performance.now() - lastMutation >= quietMs && pendingImages() === 0) {
+                    settled = true;
+                    break;
+                }
+                await delay(100);
+            }
+        } finally {
+            observer.disconnect();
+        }
+        
+        const lazySelector = 'img[loading="lazy"], img[data-src], img[data-srcset], img[data-lazy-src], ' +
+                             'iframe[loading="lazy"], .lazyload, .lazy, [data-bg], [data-background]';
+        const lazyPending = Array.from(document.querySelectorAll(lazySelector))
+            .filter(el => el.tagName !== 'IMG' || !el.complete || el.naturalWidth === 0).length;
+        const scrollable = document.documentElement.scrollHeight > window.innerHeight * 1.2;
+        
+        return {
+            settled: settled,
+            pendingImages: pendingImages(),
+            lazyElements: lazyPending,
+            lazy: scrollable && lazyPending > 0
+        };
+    }
+'''
+
+# Recorre la página para disparar la carga diferida y vuelve arriba
+SCROLL_SCRIPT = '''
+    async ({maxPixels, maxMs, stallRounds}) => {
+        const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
+        const scroller = document.scrollingElement || document.documentElement;
+        const started = performance.now();
+        let position = 0;
+        let lastHeight = scroller.scrollHeight;
+        let stalls = 0;
+        let stop = 'end';
+        
+        // Baja por pasos releyendo la altura: las páginas infinitas crecen
+        // mientras se hace scroll. Se para al dejar de crecer o al llegar a un tope
+        while (true) {
+            if (position >= maxPixels) { stop = 'pixels'; break; }
+            if (performance.now() - started >= maxMs) { stop = 'time'; break; }
+            
+            position = Math.min(position + window.innerHeight * 0.8, maxPixels);
+            window.scrollTo({top: position, behavior: 'instant'});
+            await delay(150);
+            
+            const height = scroller.scrollHeight;
+            if (position + window.innerHeight >= height) {
+                // Al final de la página: dar tiempo a que cargue más contenido
+                if (height > lastHeight) {
+                    stalls = 0;
+                } else if (++stalls >= stallRounds) {
+                    break;
+                } else {
+                    await delay(400);
+                }
+            }
+            lastHeight = Math.max(lastHeight, scroller.scrollHeight);
+        }
+        
+        window.scrollTo({top: 0, behavior: 'instant'});
+        return {
+            stop: stop,
+            pixels: Math.round(position),
+            height: scroller.scrollHeight,
+            elapsed: Math.round(performance.now() - started)
+        };
+    }
+'''
+
+# Recorta la página al tope de scroll para que un feed infinito no genere
+# un PDF de cientos de páginas
+CLIP_HEIGHT_SCRIPT = '''
+    (maxPixels) => {
+        for (const el of [document.documentElement, document.body]) {
+            el.style.setProperty('max-height', maxPixels + 'px', 'important');
+            el.style.setProperty('overflow', 'hidden', 'important');
+        }
+    }
+'''
+
+# Texto estructurado de la página para el sidecar que usa el extractor
+DOM_CAPTURE_SCRIPT = '''
+    () => {
+        const clean = text => (text || '').replace(/\\s+/g, ' ').trim();
+        const root = document.querySelector('main, article, [role="main"]') || document.body;
+        
+        const headings = Array.from(document.querySelectorAll('h1, h2, h3'))
+            .map(h => ({level: Number(h.tagName[1]), text: clean(h.innerText)}))
+            .filter(h => h.text);
+        
+        const seen = new Set();
+        const links = [];
+        const emails = new Set();
+        for (const a of root.querySelectorAll('a[href]')) {
+            const href = a.href;
+            if (href.startsWith('mailto:')) {
+                emails.add(decodeURIComponent(href.slice(7).split('?')[0]).trim());
+                continue;
+            }
+            if (!href.startsWith('http') || seen.has(href)) continue;
+            seen.add(href);
+            links.push({href: href, text: clean(a.innerText)});
+        }
+        
+        return {
+            title: document.title,
+            text: document.body ? document.body.innerText : '',
+            headings: headings,
+            links: links,
+            emails: Array.from(emails)
+        };
+    }
+'''
+
+# Tamaño de la página para saber si el scroll cargó contenido nuevo
+PAGE_SIZE_SCRIPT = '''
+    () => ({
+        height: document.documentElement.scrollHeight,
+        text: document.body ? document.body.innerText.length : 0
+    })
+'''
+
+# Fuentes cargadas y un frame pintado tras emular medios de impresión
+PRINT_LAYOUT_SCRIPT = '''
+    async () => {
+        if (document.fonts && document.fonts.ready) {
+            await document.fonts.ready;
+        }
+        await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+        return true;
+    }
+'''
+
+# Manifiesto de URLs exportadas dentro de la carpeta de salida
+MANIFEST_FILENAME = "manifest_exportacion.json"
+
+# Títulos de páginas de verificación anti-bot
+CHALLENGE_TITLES = ("just a moment", "attention required", "access denied", "are you a robot")
+
+# Días que se confía en que un dominio no tiene banner de cookies
+NO_BANNER_TTL_DAYS = 7
+
+# Botones de gestores de consentimiento conocidos, luego selectores genéricos
+COOKIE_SELECTORS = [
+    '#onetrust-accept-btn-handler',
+    '#CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll',
+    '#CybotCookiebotDialogBodyButtonAccept',
+    '#didomi-notice-agree-button',
+    '#truste-consent-button',
+    '.cky-btn-accept',
+    '.cc-allow',
+    '.cc-dismiss',
+    '.osano-cm-accept-all',
+    '[data-testid="uc-accept-all-button"]',
+    # Solo controles pulsables: un contenedor "accept" no cierra nada
+    'button[id*="accept"]',
+    'a[id*="accept"]',
+    '[role="button"][id*="accept"]',
+    'button[class*="accept"]',
+    'a[class*="accept"]',
+    '[role="button"][class*="accept"]',
+    '[class*="cookie"] button',
+    '[class*="consent"] button'
+]
+
+# Textos de botones de aceptación (comparación exacta, sin mayúsculas)
+COOKIE_ACCEPT_TEXTS = [
+    'accept', 'accept all', 'accept cookies', 'accept all cookies', 'allow all',
+    'agree', 'i agree', 'ok', 'got it', 'aceptar', 'aceptar todo', 'aceptar todas',
+    'aceptar cookies', 'acepto', 'entendido', 'de acuerdo', 'permitir todas'
+]
+
+# Busca y pulsa el control de consentimiento en un solo viaje de ida y vuelta.
+# "preferred" es el selector recordado para el dominio ("text:..." para botones por texto).
+COOKIE_DISMISS_SCRIPT = '''
+    ({preferred, selectors, texts}) => {
+        const visible = el => {
+            const rect = el.getBoundingClientRect();
+            const style = window.getComputedStyle(el);
+            return rect.width > 0 && rect.height > 0 &&
+                   style.visibility !== 'hidden' && style.display !== 'none';
+        };
+        const label = el => (el.innerText || el.value || '').trim().toLowerCase();
+        const clickables = 'button, a, [role="button"], input[type="button"], input[type="submit"]';
+        
+        const byText = text => Array.from(document.querySelectorAll(clickables))
+            .find(el => visible(el) && label(el) === text);
+        const bySelector = selector => {
+            try {
+                return Array.from(document.querySelectorAll(selector)).find(visible);
+            } catch (e) {
+                return null;
+            }
+        };
+        const find = key => key.startsWith('text:') ? byText(key.slice(5)) : bySelector(key);
+        
+        const candidates = preferred ? [preferred] : [];
+        candidates.push(...selectors, ...texts.map(text => 'text:' + text));
+        
+        for (const key of candidates) {
+            const el = find(key);
+            if (el) {
+                el.setAttribute('data-cookie-dismiss', '');
+                el.click();
+                return {clicked: true, selector: key};
+            }
+        }
+        return {clicked: false, selector: null};
+    }
+'''
+
+# El banner se considera cerrado si el control pulsado ya no está visible
+COOKIE_DISMISSED_SCRIPT = '''
+    () => {
+        const el = document.querySelector('[data-cookie-dismiss]');
+        if (!el) {
+            return true;
+        }
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return !(rect.width > 0 && rect.height > 0 &&
+                 style.visibility !== 'hidden' && style.display !== 'none');
+    }
+'''
+
+# Dominios de analítica, publicidad y rastreo que nunca aportan al PDF
+TRACKER_DOMAINS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'facebook.net',
+    'connect.facebook.net',
+    'hotjar.com',
+    'clarity.ms',
+    'segment.io',
+    'mixpanel.com',
+    'newrelic.com',
+    'nr-data.net',
+    'quantserve.com',
+    'scorecardresearch.com',
+    'addthis.com',
+    'sharethis.com',
+    'linkedin.com/px',
+    'ads.linkedin.com',
+    'twitter.com/i/adsct',
+    'analytics.twitter.com'
+)
+
 def get_output_dir():
     """Obtiene la carpeta de salida desde config.py actualizada"""
     import config
@@ -20,6 +359,13 @@ def get_output_dir():
     importlib.reload(config)
     return config.PDFS_SALIDA
 
+def get_results_dir() -> Path:
+    """Obtiene la carpeta de resultados (métricas) desde config.py actualizada"""
+    import config
+    import importlib
+    importlib.reload(config)
+    return Path(config.RESULTADOS)
+
 def get_pdf_config():
     """Obtiene la configuración de PDF desde config.py actualizada"""
     import config
@@ -27,6 +373,318 @@ def get_pdf_config():
     importlib.reload(config)
     return config.PDF_CONFIG
 
+def get_cache_dir() -> Path:
+    """Obtiene la carpeta de caché del exportador desde config.py"""
+    import config
+    import importlib
+    importlib.reload(config)
+    cache_dir = Path(getattr(config, "CACHE_DIR", Path(config.BASE_DIR) / ".cache"))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+def get_export_config() -> Dict:
+    """Obtiene la configuración del exportador desde config.py, con valores por defecto"""
+    import config
+    import importlib
+    importlib.reload(config)
+    export_config = dict(DEFAULT_EXPORT_CONFIG)
+    export_config.update(getattr(config, "EXPORT_CONFIG", {}))
+    return export_config
+
+def get_domain(url: str) -> str:
+    """
+    Obtiene el dominio de una URL sin el prefijo www.
+    """
+    domain = urlparse(url).netloc.lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+def is_tracker(url: str) -> bool:
+    """
+    Indica si una petición va a un dominio de analítica o publicidad conocido
+    """
+    parsed = urlparse(url)
+    target = parsed.netloc.lower() + parsed.path
+    return any(
+        target.startswith(tracker) or f".{tracker}" in target
+        for tracker in TRACKER_DOMAINS
+    )
+
+async def install_resource_blocking(page, blocked_types: List[str], block_trackers: bool):
+    """
+    Bloquea tipos de recurso y rastreadores que no hacen falta para imprimir
+    """
+    blocked_types = set(blocked_types or [])
+    if not blocked_types and not block_trackers:
+        return
+    
+    async def handle_route(route):
+        request = route.request
+        if request.resource_type in blocked_types or (block_trackers and is_tracker(request.url)):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    await page.route("**/*", handle_route)
+
+class CookieBannerMemory(JsonStore):
+    """
+    Recuerda por dominio qué selector cerró el banner de cookies
+    o que el dominio no muestra banner, para no volver a detectarlo
+    """
+
+    def __init__(self, path: Path, no_banner_ttl_days: int = NO_BANNER_TTL_DAYS):
+        super().__init__(path, "Memoria de cookies")
+        self.no_banner_ttl = no_banner_ttl_days * 86400
+
+    def lookup(self, domain: str) -> Optional[Dict]:
+        entry = self.entries.get(domain)
+        if not entry:
+            return None
+        if entry.get("selector") is None and time.time() - entry.get("updated", 0) > self.no_banner_ttl:
+            return None
+        return entry
+
+    def remember(self, domain: str, selector: Optional[str]):
+        self.set(domain, {"selector": selector, "updated": time.time()})
+
+    def forget(self, domain: str):
+        """Descarta lo aprendido (caduca ya, así que el dominio se vuelve a detectar)"""
+        self.set(domain, {"selector": None, "updated": 0})
+
+class ExportManifest(JsonStore):
+    """
+    Manifiesto de URLs exportadas en la carpeta de salida
+    Guarda ETag, Last-Modified y hash del texto del DOM para reutilizar
+    el PDF existente cuando la página no ha cambiado
+    """
+
+    def __init__(self, output_dir: Path):
+        super().__init__(output_dir / MANIFEST_FILENAME, "Manifiesto de exportación")
+        self.output_dir = output_dir
+
+    def cached_pdf(self, url: str) -> Optional[Dict]:
+        """Entrada del manifiesto si su PDF sigue en disco"""
+        entry = self.entries.get(url)
+        if entry and entry.get("filename") and (self.output_dir / entry["filename"]).exists():
+            return entry
+        return None
+
+    def matches_validators(self, url: str, probe: Optional[Dict]) -> bool:
+        """El servidor confirma (ETag o Last-Modified) que la página no cambió"""
+        entry = self.cached_pdf(url)
+        if not entry or not probe or probe["status"] >= 400:
+            return False
+        if entry.get("etag") and probe.get("etag"):
+            return entry["etag"] == probe["etag"]
+        if entry.get("last_modified") and probe.get("last_modified"):
+            return entry["last_modified"] == probe["last_modified"]
+        return False
+
+    def matches_content(self, url: str, content_hash: str) -> bool:
+        entry = self.cached_pdf(url)
+        return bool(entry) and entry.get("content_hash") == content_hash
+
+    def record(self, url: str, filename: str, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, content_hash: Optional[str] = None,
+               attachments: List[Dict] = None):
+        previous = self.entries.get(url)
+        if previous and previous.get("filename") and previous["filename"] != filename:
+            self._remove_replaced(url, previous["filename"], filename)
+        self.set(url, {
+            "filename": filename,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "attachments": attachments or [],
+            "updated": datetime.now().isoformat(timespec='seconds')
+        })
+
+    def _remove_replaced(self, url: str, old_name: str, new_name: str):
+        """
+        Borra el documento que la URL tenía antes (p. ej. el .pdf cuando ahora
+        se guarda como .html), con su sidecar y sus anexos, para que el
+        extractor no analice la misma convocatoria dos veces
+        """
+        if any(entry.get("filename") == old_name
+               for other, entry in self.entries.items() if other != url):
+            return
+        old_path = self.output_dir / old_name
+        replaced = [old_path]
+        # Con el mismo nombre base, el sidecar y los anexos ya son los del nuevo
+        if old_path.stem != Path(new_name).stem:
+            replaced += [sidecar_path(old_path)] + find_attachments(old_path)
+        for path in replaced:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                print(f"   ⚠️ No se pudo borrar {path.name}: {e}")
+        print(f"   🗑️ Sustituido {old_name} por {new_name}")
+
+class ExportSession:
+    """
+    Estado compartido por todas las páginas de una exportación
+    """
+
+    def __init__(self, pages: ContextPool, output_dir: Path, pdf_options: Dict, timeout: int,
+                 wait_after_load: int, handle_cookies: bool, use_cache: bool,
+                 export_config: Dict, http_client):
+        self.pages = pages
+        self.output_dir = output_dir
+        self.pdf_options = pdf_options
+        self.timeout = timeout
+        self.wait_after_load = wait_after_load
+        self.handle_cookies = handle_cookies
+        self.use_cache = use_cache
+        self.export_config = export_config
+        self.http_client = http_client
+        self.cookie_memory = CookieBannerMemory(get_cache_dir() / "cookie_banners.json")
+        self.manifest = ExportManifest(output_dir)
+        self.profiles = DomainProfileStore(
+            get_cache_dir() / "domain_profiles.json",
+            seeds=SEED_DOMAIN_PROFILES
+        )
+        self.attachments = None
+        if export_config["harvest_attachments"]:
+            self.attachments = AttachmentHarvester(
+                http_client,
+                per_host=export_config["attachment_per_host"],
+                max_bytes=export_config["attachment_max_mb"] * 1024 * 1024,
+                max_files=export_config["attachment_max_files"]
+            )
+
+    def save(self):
+        self.cookie_memory.save()
+        self.manifest.save()
+        self.profiles.save()
+
+    def seed_profile(self, domain: str) -> Dict:
+        """Perfil inicial del dominio (bloqueo de recursos, semillas de tiempos)"""
+        return self.profiles.seed(domain)
+
+    def wait_budget(self, domain: str) -> int:
+        if not self.export_config["learn_domain_timings"]:
+            return self.seed_profile(domain).get('wait_time', self.wait_after_load)
+        return self.profiles.wait_budget(domain, self.wait_after_load)
+
+    def needs_browser(self, domain: str) -> bool:
+        if not self.export_config["learn_domain_timings"]:
+            return self.seed_profile(domain).get('needs_browser', False)
+        return self.profiles.needs_browser(domain)
+    
+    def needs_scroll(self, domain: str) -> bool:
+        if not self.export_config["learn_domain_timings"]:
+            return self.seed_profile(domain).get('needs_scroll', True)
+        return self.profiles.needs_scroll(domain)
+
+async def dismiss_cookie_banner(page, url: str, memory: CookieBannerMemory, index: int = 0) -> Optional[str]:
+    """
+    Cierra el banner de cookies en una sola pasada dentro de la página
+    Usa primero el selector recordado para el dominio y solo recuerda un
+    selector si el banner desaparece tras pulsarlo
+    """
+    domain = get_domain(url)
+    known = memory.lookup(domain)
+    
+    if known and known["selector"] is None:
+        return None
+    
+    preferred = known["selector"] if known else None
+    try:
+        outcome = await page.evaluate(COOKIE_DISMISS_SCRIPT, {
+            "preferred": preferred,
+            "selectors": COOKIE_SELECTORS,
+            "texts": COOKIE_ACCEPT_TEXTS
+        })
+    except Exception:
+        return preferred
+    
+    if outcome["clicked"]:
+        await page.wait_for_timeout(500)
+        try:
+            dismissed = await page.evaluate(COOKIE_DISMISSED_SCRIPT)
+        except Exception:
+            dismissed = False
+        if not dismissed:
+            # El clic no cerró el banner: no aprender ese selector
+            print(f"   [{index}] 🍪 El banner sigue visible tras pulsar {outcome['selector']}")
+            if outcome["selector"] == preferred:
+                memory.forget(domain)
+            return None
+        print(f"   [{index}] 🍪 Banner cerrado ({outcome['selector']})")
+        memory.remember(domain, outcome["selector"])
+        return outcome["selector"]
+    
+    if not preferred:
+        memory.remember(domain, None)
+    return None
+
+async def capture_page_text(page) -> Optional[Dict]:
+    """
+    Captura del DOM el texto visible, títulos, enlaces y correos de la página
+    """
+    try:
+        return await page.evaluate(DOM_CAPTURE_SCRIPT)
+    except Exception:
+        return None
+
+async def is_challenge_page(page) -> bool:
+    """
+    Detecta páginas intermedias de verificación (Cloudflare, Incapsula...)
+    """
+    try:
+        title = (await page.title()).lower()
+    except Exception:
+        return False
+    return any(marker in title for marker in CHALLENGE_TITLES)
+
+async def page_content_hash(page) -> Optional[str]:
+    """
+    Hash del texto visible del DOM normalizado (minúsculas, espacios colapsados)
+    """
+    try:
+        text = await page.evaluate("() => document.body ? document.body.innerText : ''")
+    except Exception:
+        return None
+    return text_content_hash(text)
+
+def text_content_hash(text: str) -> Optional[str]:
+    normalized = re.sub(r'\s+', ' ', text or '').strip().lower()
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+async def wait_until_ready(page, max_wait_ms: int, quiet_ms: int = READINESS_QUIET_MS) -> Dict:
+    """
+    Espera a que la página esté lista: red inactiva, DOM sin mutaciones
+    durante quiet_ms e imágenes visibles cargadas, con max_wait_ms como tope
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    
+    try:
+        await page.wait_for_load_state("networkidle", timeout=max_wait_ms)
+    except Exception:
+        # Sitios con long-polling nunca llegan a networkidle; seguimos con el DOM
+        pass
+    
+    remaining = max(quiet_ms, max_wait_ms - int((loop.time() - start) * 1000))
+    try:
+        state = await page.evaluate(READINESS_SCRIPT, {"quietMs": quiet_ms, "maxMs": remaining})
+    except Exception:
+        state = {"settled": False, "lazy": True}
+    
+    state["elapsed"] = int((loop.time() - start) * 1000)
+    return state
+
+async def wait_for_print_layout(page, max_wait_ms: int = 2000):
+    """
+    Espera a que las fuentes y el layout de impresión estén listos
+    """
+    try:
+        await asyncio.wait_for(page.evaluate(PRINT_LAYOUT_SCRIPT), max_wait_ms / 1000)
+    except Exception:
+        pass
+
 def sanitize_filename(text: str, max_length: int = 50) -> str:
     """
     Limpia texto para usarlo como nombre de archivo seguro
@@ -49,18 +707,346 @@ def parse_margins(margin_str: str) -> Dict[str, str]:
         "right": margin_str
     }
 
-async def filename_from_title(page, index: int) -> str:
+def url_file_id(url: str) -> str:
+    """
+    Sufijo estable por URL para los nombres de archivo: dos URLs con el mismo
+    título nunca comparten archivo, y la misma URL conserva su nombre
+    """
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:10]
+
+async def filename_from_title(page, url: str) -> str:
     """
     Genera nombre de archivo desde el título de la página
     """
     try:
         title = await page.title()
         filename = sanitize_filename(title)
-        return f"{filename}_{index}"
+        return f"{filename}_{url_file_id(url)}"
     except:
-        return f"documento_{index}"
+        return f"documento_{url_file_id(url)}"
+
+class DomainScheduler:
+    """
+    Planificador de cortesía por dominio
+
+    Limita cuántas páginas de un mismo dominio se renderizan a la vez y
+    mantiene una pausa aleatoria entre visitas al mismo dominio. Dominios
+    distintos no se esperan entre sí.
+    """
+
+    def __init__(self, per_domain_concurrency: int = 1, delay_range: Tuple[float, float] = (3, 7)):
+        self.per_domain_concurrency = max(1, per_domain_concurrency)
+        self.delay_range = tuple(delay_range)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def _pause(self) -> float:
+        return random.uniform(*self.delay_range)
+
+    @asynccontextmanager
+    async def slot(self, url: str, index: int = 0):
+        domain = get_domain(url)
+        semaphore = self._semaphores.setdefault(
+            domain, asyncio.Semaphore(self.per_domain_concurrency)
+        )
+        loop = asyncio.get_running_loop()
+        
+        async with semaphore:
+            now = loop.time()
+            start = max(now, self._next_slot.get(domain, now))
+            # Reservar el turno antes de dormir para espaciar los arranques
+            self._next_slot[domain] = start + self._pause()
+            if start > now:
+                print(f"   [{index}] ⏳ Esperando {start - now:.1f}s por cortesía con {domain}...")
+                await asyncio.sleep(start - now)
+            try:
+                yield domain
+            finally:
+                # La pausa también cuenta desde que termina la visita
+                self._next_slot[domain] = max(
+                    self._next_slot[domain], loop.time() + self._pause()
+                )
+
+def cached_result(url: str, entry: Dict, output_dir: Path, reason: str) -> Dict:
+    """
+    Resultado de exportación que reutiliza un PDF ya existente
+    """
+    filepath = output_dir / entry["filename"]
+    return {
+        "url": url,
+        "filename": filepath.name,
+        "filepath": str(filepath),
+        "status": "success",
+        "cache": "hit",
+        "message": f"Sin cambios ({reason}), se reutiliza: {filepath.name}"
+    }
+
+async def download_pdf(session: ExportSession, url: str, index: int, probe: Dict,
+                       timer: PhaseTimer) -> Dict:
+    """
+    Guarda un PDF original tal cual, sin pasar por Chromium
+    Conserva la capa de texto original que luego lee el extractor
+    """
+    original_name = filename_from_headers(probe.get("content_disposition"), probe["final_url"])
+    stem = sanitize_filename(re.sub(r'\.pdf$', '', original_name, flags=re.IGNORECASE))
+    filepath = session.output_dir / f"{stem}_{url_file_id(url)}.pdf"
+    
+    print(f"   [{index}] 📥 La URL es un PDF, descargando directamente...")
+    download = await download_file(session.http_client, url, filepath, expected_magic=b'%PDF')
+    timer.lap("download")
+    
+    session.manifest.record(
+        url, filepath.name,
+        etag=download["etag"],
+        last_modified=download["last_modified"],
+        content_hash=download["sha256"]
+    )
+    
+    print(f"   [{index}] ✅ Descargado como: {filepath.name} ({download['bytes'] // 1024} KB)")
+    
+    return {
+        "url": url,
+        "filename": filepath.name,
+        "filepath": str(filepath),
+        "status": "success",
+        "cache": "miss",
+        "render": "download",
+        "message": f"PDF descargado: {filepath.name}"
+    }
+
+async def fetch_static_page(session: ExportSession, url: str, index: int, probe: Optional[Dict],
+                            timer: PhaseTimer) -> Optional[Dict]:
+    """
+    Intenta guardar la página sin navegador: si el HTML del servidor ya trae
+    el contenido, se guarda el HTML y su sidecar de texto para el extractor.
+    Devuelve None si la página necesita JavaScript (se usará el navegador)
+    """
+    domain = get_domain(url)
+    manifest = session.manifest
+    fetched = await fetch_html(session.http_client, url)
+    timer.lap("static_fetch")
+    if fetched is None:
+        return None
+    
+    capture = html_to_capture(fetched["html"], fetched["final_url"])
+    usable = has_static_content(capture, fetched["html"], session.export_config["static_min_text"])
+    session.profiles.record_static(domain, usable)
+    if not usable:
+        print(f"   [{index}] 🧩 El HTML no trae el contenido, se usará el navegador")
+        return None
+    
+    content_hash = text_content_hash(capture["text"])
+    if session.use_cache and content_hash and manifest.matches_content(url, content_hash):
+        print(f"   [{index}] ♻️ Contenido idéntico al anterior, se reutiliza el archivo")
+        return cached_result(url, manifest.cached_pdf(url), session.output_dir, "mismo contenido")
+    
+    title = sanitize_filename(capture["title"]) if capture["title"] else "documento"
+    filepath = session.output_dir / f"{title}_{url_file_id(url)}.html"
+    filepath.write_text(fetched["html"], encoding='utf-8')
+    
+    attachments = []
+    if session.attachments:
+        attachments = await session.attachments.harvest(filepath, capture["links"], url, index)
+        timer.lap("attachments")
+    
+    write_sidecar(filepath, url, capture, attachments)
+    manifest.record(
+        url, filepath.name,
+        etag=fetched["etag"] or (probe or {}).get('etag'),
+        last_modified=fetched["last_modified"] or (probe or {}).get('last_modified'),
+        content_hash=content_hash,
+        attachments=attachments
+    )
+    timer.lap("save")
+    
+    print(f"   [{index}] ⚡ Página estática, guardada sin navegador: {filepath.name}")
+    
+    return {
+        "url": url,
+        "filename": filepath.name,
+        "filepath": str(filepath),
+        "status": "success",
+        "cache": "miss",
+        "render": "http",
+        "attachments": attachments,
+        "message": f"HTML guardado: {filepath.name}"
+    }
 
-async def print_urls_to_pdf(
+async def export_page(session: ExportSession, url: str, index: int, total: int,
+                      timer: PhaseTimer) -> Dict:
+    """
+    Exporta una sola URL a PDF usando el contexto de navegador de la sesión
+    Si la página no cambió desde la última exportación, reutiliza el PDF
+    Cada fase queda anotada en timer
+    """
+    export_config = session.export_config
+    manifest = session.manifest
+    domain = get_domain(url)
+    timings: Dict[str, int] = {}
+    page = None
+    try:
+        print(f"\n📄 Procesando {index}/{total}: {url}")
+        
+        probe = await probe_url(session.http_client, url)
+        timer.lap("probe")
+        if session.use_cache and manifest.matches_validators(url, probe):
+            print(f"   [{index}] ♻️ Sin cambios según el servidor, se reutiliza el PDF")
+            return cached_result(url, manifest.cached_pdf(url), session.output_dir, "ETag/Last-Modified")
+        
+        if is_pdf_response(probe, url):
+            return await download_pdf(session, url, index, probe, timer)
+        
+        # Primero sin navegador; Chromium solo para dominios que necesitan JavaScript
+        if export_config["static_fetch"] and not session.needs_browser(domain):
+            static = await fetch_static_page(session, url, index, probe, timer)
+            if static:
+                return static
+        
+        page = await session.pages.open_page(domain)
+        
+        await page.set_extra_http_headers({
+            'Accept-Language': 'es-ES,es;q=0.9',
+        })
+        
+        seed = session.seed_profile(domain)
+        blocked_types = seed.get('block_resources', export_config["block_resources"])
+        await install_resource_blocking(page, blocked_types, export_config["block_trackers"])
+        
+        print(f"   [{index}] ⏳ Cargando página...")
+        timer.lap("page_setup")
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=session.timeout)
+        except:
+            response = await page.goto(url, wait_until="networkidle", timeout=session.timeout)
+        timings["load_ms"] = timer.lap("goto")
+        
+        headers = response.headers if response else {}
+        if response:
+            status_failure = classify_status(response.status)
+            if status_failure:
+                raise ExportError(status_failure, f"HTTP {response.status}")
+        
+        # Tope de espera aprendido del dominio (p95 de estabilización)
+        wait_time = session.wait_budget(domain)
+        readiness = await wait_until_ready(page, wait_time)
+        timer.lap("wait")
+        # Las visitas que agotan el tope también cuentan, para que el presupuesto crezca
+        timings["settle_ms"] = readiness['elapsed']
+        timings["settle_capped"] = not readiness['settled']
+        print(f"   [{index}] ⏳ Página lista en {readiness['elapsed']/1000:.1f}s"
+              f"{'' if readiness['settled'] else f' (tope de {wait_time/1000:.1f}s alcanzado)'}")
+        
+        if await is_challenge_page(page):
+            raise ExportError(ANTI_BOT, "Página de verificación anti-bot")
+        
+        if session.handle_cookies:
+            await dismiss_cookie_banner(page, url, session.cookie_memory, index)
+        timer.lap("cookies")
+        
+        content_hash = await page_content_hash(page)
+        timer.lap("content_hash")
+        if session.use_cache and content_hash and manifest.matches_content(url, content_hash):
+            session.profiles.record(domain, True, **timings)
+            print(f"   [{index}] ♻️ Contenido idéntico al anterior, se reutiliza el PDF")
+            return cached_result(url, manifest.cached_pdf(url), session.output_dir, "mismo contenido")
+        
+        scroll_changed = None
+        scroll = None
+        if readiness['lazy'] and session.needs_scroll(domain):
+            print(f"   [{index}] 🖱️ Contenido diferido detectado, haciendo scroll...")
+            before = await page.evaluate(PAGE_SIZE_SCRIPT)
+            scroll = await page.evaluate(SCROLL_SCRIPT, {
+                "maxPixels": export_config["scroll_max_pixels"],
+                "maxMs": export_config["scroll_max_ms"],
+                "stallRounds": export_config["scroll_stall_rounds"]
+            })
+            await wait_until_ready(page, min(wait_time, LAZY_SETTLE_MAX_MS))
+            after = await page.evaluate(PAGE_SIZE_SCRIPT)
+            scroll_changed = (after["height"] > before["height"] or
+                              after["text"] > before["text"] * 1.02)
+            if scroll["stop"] != "end":
+                # Tope alcanzado: el PDF solo incluye lo recorrido
+                await page.evaluate(CLIP_HEIGHT_SCRIPT, max(scroll["pixels"], before["height"]))
+                print(f"   [{index}] ✂️ Scroll detenido por tope de "
+                      f"{'píxeles' if scroll['stop'] == 'pixels' else 'tiempo'} "
+                      f"({scroll['pixels']}px, {scroll['elapsed']/1000:.1f}s), página recortada")
+            timer.lap("scroll")
+        
+        capture = None
+        if export_config["write_text_sidecar"] or session.attachments:
+            capture = await capture_page_text(page)
+            timer.lap("capture")
+        
+        filename = await filename_from_title(page, url)
+        filepath = session.output_dir / f"{filename}.pdf"
+        
+        print(f"   [{index}] 📁 Guardando en: {filepath}")
+        
+        await page.emulate_media(media="print")
+        await wait_for_print_layout(page)
+        
+        print(f"   [{index}] 📝 Generando PDF...")
+        timer.lap("print_layout")
+        await page.pdf(path=str(filepath), **session.pdf_options)
+        timings["render_ms"] = timer.lap("pdf")
+        
+        session.profiles.record(domain, True, scroll_changed=scroll_changed, **timings)
+        
+        attachments = []
+        if session.attachments and capture:
+            # La página ya no hace falta: liberarla antes de descargar
+            await session.pages.release(page)
+            page = None
+            attachments = await session.attachments.harvest(filepath, capture["links"], url, index)
+            timer.lap("attachments")
+        
+        if capture and export_config["write_text_sidecar"]:
+            write_sidecar(filepath, url, capture, attachments)
+        
+        manifest.record(
+            url, filepath.name,
+            etag=headers.get('etag') or (probe or {}).get('etag'),
+            last_modified=headers.get('last-modified') or (probe or {}).get('last_modified'),
+            content_hash=content_hash,
+            attachments=attachments
+        )
+        timer.lap("save")
+        
+        print(f"   [{index}] ✅ Guardado como: {filepath.name}")
+        
+        return {
+            "url": url,
+            "filename": filepath.name,
+            "filepath": str(filepath),
+            "status": "success",
+            "cache": "miss",
+            "render": "browser",
+            "scroll": scroll,
+            "attachments": attachments,
+            "message": f"PDF guardado: {filepath.name}"
+        }
+        
+    except Exception as e:
+        error_type = classify_failure(e)
+        error_msg = FAILURE_MESSAGES.get(error_type, str(e)[:200])
+        
+        print(f"   [{index}] ❌ Error ({error_type}): {error_msg}")
+        session.profiles.record(domain, False, **timings)
+        
+        return {
+            "url": url,
+            "filename": None,
+            "filepath": None,
+            "status": "error",
+            "cache": "miss",
+            "error_type": error_type,
+            "message": error_msg
+        }
+    finally:
+        if page is not None:
+            await session.pages.release(page)
+
+async def iter_export_results(
     urls: List[str],
     output_dir: Path = None,
     paper: str = None,
@@ -70,17 +1056,38 @@ async def print_urls_to_pdf(
     scale: float = None,
     timeout: int = 60000,
     wait_after_load: int = 5000,
-    handle_cookies: bool = True
-) -> List[Dict]:
+    handle_cookies: bool = True,
+    max_concurrent_pages: int = None,
+    browser=None,
+    use_cache: bool = None,
+    indices: List[int] = None,
+    total: int = None,
+    profile_slot: int = 0,
+    metrics_batch: str = None
+) -> AsyncIterator[Dict]:
     """
     Exporta lista de URLs a PDFs con configuración anti-detección mejorada
-    AHORA LEE LA RUTA ACTUAL DESDE CONFIG
+    y entrega cada resultado en cuanto su PDF está escrito (orden de llegada).
+    Renderiza varias páginas a la vez; el DomainScheduler mantiene las
+    pausas y el límite de concurrencia de cada dominio.
+    Si se pasa browser (p. ej. el del BrowserService) se reutiliza y solo
+    se cierra el contexto creado para esta llamada.
+    Cada resultado indica en "cache" si fue "hit" (PDF reutilizado) o "miss",
+    y en "index" su posición (desde 1) en la lista de URLs, o el valor
+    correspondiente de indices si se exporta un fragmento de una lista mayor
+    (total es entonces el tamaño de esa lista, solo para los mensajes).
+    Con browser_profile activo y sin browser, se usa un perfil persistente
+    en la caché (profile_slot lo separa entre procesos de exportación).
+    Cada resultado incluye "timings" (ms por fase), "total_ms", "bytes" y
+    "pdf_pages", y se añade a metricas_exportacion.jsonl en RESULTADOS
+    (metrics_batch identifica el lote; por defecto la hora de inicio).
     """
     # Obtener configuración actualizada
     if output_dir is None:
         output_dir = get_output_dir()
     
     pdf_config = get_pdf_config()
+    export_config = get_export_config()
     
     if paper is None:
         paper = pdf_config["paper"]
@@ -90,35 +1097,47 @@ async def print_urls_to_pdf(
         print_background = pdf_config["print_background"]
     if scale is None:
         scale = pdf_config["scale"]
+    if max_concurrent_pages is None:
+        max_concurrent_pages = export_config["max_concurrent_pages"]
+    if use_cache is None:
+        use_cache = export_config["reuse_unchanged"]
     
     # Asegurar que la carpeta existe
     output_dir.mkdir(parents=True, exist_ok=True)
     print(f"📁 Guardando PDFs en: {output_dir}")
+    print(f"⚙️ Páginas simultáneas: {max_concurrent_pages} | Headless: {'Sí' if export_config['headless'] else 'No'}")
     
-    margin_dict = parse_margins(margin)
-    results = []
-    
-    # Sitios problemáticos conocidos
-    PROBLEMATIC_SITES = {
-        'undp.org': {'wait_time': 8000, 'needs_scroll': True},
-        'unicef.org': {'wait_time': 8000, 'needs_scroll': True},
-        'iom.int': {'wait_time': 7000, 'needs_scroll': True},
-        'glasswing.org': {'wait_time': 6000, 'needs_scroll': True}
+    pdf_options = {
+        "format": paper,
+        "print_background": print_background,
+        "landscape": landscape,
+        "margin": parse_margins(margin),
+        "prefer_css_page_size": pdf_config["prefer_css_page_size"],
+        "scale": scale
     }
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=False,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-features=IsolateOrigins,site-per-process',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-dev-shm-usage'
-            ]
-        )
+    scheduler = DomainScheduler(
+        per_domain_concurrency=export_config["per_domain_concurrency"],
+        delay_range=export_config["per_domain_delay"]
+    )
+    page_pool = asyncio.Semaphore(max(1, max_concurrent_pages))
+    
+    # Perfil persistente: caché HTTP y service workers en disco entre ejecuciones
+    persistent = export_config["browser_profile"] and browser is None
+    storage = None
+    if export_config["persist_storage"] and not persistent:
+        storage = DomainStorageStore(get_cache_dir() / "storage_state")
+    batch_domains = {get_domain(url) for url in urls}
+    
+    async with AsyncExitStack() as stack:
+        if browser is None:
+            # Sin servicio: navegador propio solo para esta llamada
+            p = await stack.enter_async_context(async_playwright())
+            if not persistent:
+                browser = await launch_browser(p, export_config["headless"])
+                stack.push_async_callback(browser.close)
         
-        context = await browser.new_context(
+        context_options = dict(
             viewport={'width': 1920, 'height': 1080},
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             locale='es-ES',
@@ -131,148 +1150,137 @@ async def print_urls_to_pdf(
             }
         )
         
-        for i, url in enumerate(urls, 1):
-            try:
-                print(f"\n📄 Procesando {i}/{len(urls)}: {url}")
-                
-                if i > 1:
-                    delay = random.uniform(3, 7)
-                    print(f"   ⏳ Esperando {delay:.1f}s...")
-                    await asyncio.sleep(delay)
-                
-                page = await context.new_page()
-                
-                await page.set_extra_http_headers({
-                    'Accept-Language': 'es-ES,es;q=0.9',
-                })
-                
-                site_config = None
-                for domain, config_site in PROBLEMATIC_SITES.items():
-                    if domain in url:
-                        site_config = config_site
-                        print(f"   ⚠️ Sitio problemático detectado...")
-                        break
-                
-                print(f"   ⏳ Cargando página...")
-                try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
-                except:
-                    await page.goto(url, wait_until="networkidle", timeout=timeout)
-                
-                wait_time = site_config['wait_time'] if site_config else wait_after_load
-                print(f"   ⏳ Esperando {wait_time/1000}s para carga completa...")
-                await page.wait_for_timeout(wait_time)
-                
-                if handle_cookies:
-                    print(f"   🍪 Buscando banners de cookies...")
-                    try:
-                        cookie_selectors = [
-                            'button:has-text("Accept")',
-                            'button:has-text("Aceptar")',
-                            'button:has-text("OK")',
-                            'button:has-text("Agree")',
-                            'button:has-text("Acepto")',
-                            'button:has-text("Entendido")',
-                            '[id*="accept"]',
-                            '[class*="accept"]',
-                            '[class*="cookie"] button',
-                            '[class*="consent"] button'
-                        ]
-                        
-                        for selector in cookie_selectors:
-                            try:
-                                if await page.locator(selector).first.is_visible(timeout=1000):
-                                    await page.locator(selector).first.click()
-                                    print(f"   ✅ Banner cerrado")
-                                    await page.wait_for_timeout(1000)
-                                    break
-                            except:
-                                continue
-                    except:
-                        pass
-                
-                if not site_config or site_config.get('needs_scroll', False):
-                    print(f"   🖱️ Simulando scroll...")
-                    await page.evaluate('''
-                        async () => {
-                            const delay = ms => new Promise(resolve => setTimeout(resolve, ms));
-                            const totalHeight = document.body.scrollHeight;
-                            const viewportHeight = window.innerHeight;
-                            let currentPosition = 0;
-                            
-                            while (currentPosition < totalHeight) {
-                                const scrollStep = Math.min(viewportHeight * 0.8, totalHeight - currentPosition);
-                                window.scrollTo({
-                                    top: currentPosition + scrollStep,
-                                    behavior: 'smooth'
-                                });
-                                currentPosition += scrollStep;
-                                await delay(500 + Math.random() * 500);
-                            }
-                            
-                            await delay(1000);
-                            window.scrollTo({top: 0, behavior: 'smooth'});
-                            await delay(1000);
-                        }
-                    ''')
-                
-                filename = await filename_from_title(page, i)
-                filepath = output_dir / f"{filename}.pdf"
-                
-                print(f"   📁 Guardando en: {filepath}")
-                
-                await page.emulate_media(media="print")
-                await page.wait_for_timeout(2000)
-                
-                print(f"   📝 Generando PDF...")
-                await page.pdf(
-                    path=str(filepath),
-                    format=paper,
-                    print_background=print_background,
-                    landscape=landscape,
-                    margin=margin_dict,
-                    prefer_css_page_size=pdf_config["prefer_css_page_size"],
-                    scale=scale
+        async def create_context():
+            if persistent:
+                profile_dir = get_cache_dir() / "browser_profile" / f"perfil-{profile_slot}"
+                return await p.chromium.launch_persistent_context(
+                    str(profile_dir),
+                    headless=export_config["headless"],
+                    args=BROWSER_LAUNCH_ARGS,
+                    **context_options
                 )
-                
-                await page.close()
-                
-                results.append({
-                    "url": url,
-                    "filename": filepath.name,
-                    "filepath": str(filepath),
-                    "status": "success",
-                    "message": f"PDF guardado: {filepath.name}"
-                })
-                
-                print(f"   ✅ Guardado como: {filepath.name}")
-                
-            except Exception as e:
-                error_msg = str(e)[:200]
-                
-                if "Access Denied" in error_msg:
-                    error_msg = "Acceso denegado - Protección anti-bot"
-                elif "timeout" in error_msg.lower():
-                    error_msg = "Timeout - El sitio tardó demasiado"
-                
-                results.append({
-                    "url": url,
-                    "filename": None,
-                    "filepath": None,
-                    "status": "error",
-                    "message": error_msg
-                })
-                print(f"   ❌ Error: {error_msg}")
-        
-        await browser.close()
+            options = dict(context_options)
+            if storage:
+                # Cookies y localStorage guardados de los dominios del lote
+                options["storage_state"] = storage.load(batch_domains)
+            return await browser.new_context(**options)
+        
+        async def save_storage(context, domains):
+            storage.save(await context.storage_state(), domains)
+        
+        # Contextos reciclados cada N páginas o al superar el umbral de memoria
+        pages = ContextPool(
+            create_context,
+            max_pages=export_config["context_max_pages"],
+            max_rss_mb=export_config["context_max_rss_mb"],
+            on_retire=save_storage if storage else None,
+            exclusive=persistent
+        )
+        stack.push_async_callback(pages.close)
+        
+        http_client = await stack.enter_async_context(create_http_client())
+        session = ExportSession(
+            pages, output_dir, pdf_options, timeout, wait_after_load,
+            handle_cookies, use_cache, export_config, http_client
+        )
+        
+        retries = RetryScheduler(
+            max_attempts=export_config["retry_attempts"],
+            base_delay=export_config["retry_base_delay"],
+            max_delay=export_config["retry_max_delay"],
+            budget=export_config["retry_budget"]
+        )
+        
+        metrics = MetricsLog(get_results_dir(), metrics_batch)
+        
+        async def attempt(index: int, url: str) -> Dict:
+            timer = PhaseTimer()
+            # Primero el turno del dominio, luego un hueco en el pool:
+            # así un dominio en pausa no bloquea páginas de otros dominios
+            async with scheduler.slot(url, index):
+                async with page_pool:
+                    timer.lap("queue")
+                    result = await export_page(session, url, index, total or len(urls), timer)
+            result["timings"] = timer.phases
+            result["total_ms"] = timer.total_ms()
+            return result
+        
+        async def run(index: int, url: str) -> Dict:
+            attempts = 1
+            try:
+                result = await attempt(index, url)
+            finally:
+                retries.fresh_attempted()
+            
+            while result["status"] == "error":
+                delay = retries.next_delay(result["error_type"], attempts)
+                if delay is None:
+                    break
+                print(f"   [{index}] 🔁 Reintento {attempts + 1} de {url[:60]} al final del lote "
+                      f"(+{delay:.0f}s, {result['error_type']})")
+                await retries.wait_turn(delay)
+                attempts += 1
+                result = await attempt(index, url)
+            
+            result["index"] = index
+            result["attempts"] = attempts
+            result["domain"] = get_domain(url)
+            # Contar páginas lee el PDF entero: fuera del bucle de eventos
+            result.update(await asyncio.get_running_loop().run_in_executor(
+                None, file_metrics, result["filepath"]))
+            metrics.write(result)
+            return result
+        
+        if indices is None:
+            indices = list(range(1, len(urls) + 1))
+        retries.add_fresh(len(urls))
+        tasks = [asyncio.ensure_future(run(i, url)) for i, url in zip(indices, urls)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # Si el consumidor deja de iterar, no dejar páginas huérfanas
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            session.save()
+            memory = pages.report()
+            if memory["peak_rss_mb"]:
+                print(f"🧠 Memoria pico de Chromium: {memory['peak_rss_mb']} MB "
+                      f"| Contextos usados: {memory['contexts']}")
+
+async def print_urls_to_pdf(urls: List[str], **kwargs) -> List[Dict]:
+    """
+    Exporta lista de URLs a PDFs y devuelve los resultados en el orden de entrada
+    (ver iter_export_results para los parámetros)
+    """
+    results = [result async for result in iter_export_results(urls, **kwargs)]
+    return sorted(results, key=lambda r: r["index"])
+
+def iter_export_urls(urls: List[str], **kwargs) -> Iterator[Dict]:
+    """
+    Versión síncrona de iter_export_results para hilos de la GUI y el CLI
+    Entrega cada resultado en cuanto su PDF está escrito, usando el
+    navegador persistente en lugar de lanzar uno nuevo
+    """
+    export_config = get_export_config()
+    if export_config["workers"] > 1:
+        from sharded_export import iter_export_sharded
+        return iter_export_sharded(urls, workers=export_config["workers"], **kwargs)
+    if not export_config["use_browser_service"] or export_config["browser_profile"]:
+        # El perfil persistente necesita su propio proceso de Chromium
+        return iterate_in_thread(lambda: iter_export_results(urls, **kwargs))
     
-    return results
+    service = get_browser_service(headless=export_config["headless"])
+    return service.iterate(lambda browser: iter_export_results(urls, browser=browser, **kwargs))
 
 def export_urls(urls: List[str], **kwargs) -> List[Dict]:
     """
     Función wrapper para ejecutar exportación desde código síncrono
+    Devuelve los resultados en el orden de las URLs
     """
-    return asyncio.run(print_urls_to_pdf(urls, **kwargs))
+    results = list(iter_export_urls(urls, **kwargs))
+    return sorted(results, key=lambda r: r["index"])
 
 if __name__ == "__main__":
     urls_test = [
@@ -0,0 +1,67 @@
+# tests/test_llm_engine.py
+"""
+Pruebas del motor asíncrono contra scripts/mock_openai_server.py
+
+    python -m unittest discover tests
+"""
+
+import asyncio
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+from llm_engine import AsyncLLMEngine, LLMError
+from mock_openai_server import MockState, make_handler
+
+MESSAGES = [{"role": "user", "content": "Archivo: prueba.pdf\nResume el documento"}]
+
+class AsyncLLMEngineTest(unittest.TestCase):
+
+    def start_server(self, state: MockState) -> str:
+        """Levanta el mock en un puerto libre y devuelve su base_url"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    def run_calls(self, base_url: str, calls: int, max_retries: int = 3, **llm_config):
+        async def run():
+            config = {"max_concurrency": 4, "requests_per_minute": 6000,
+                      "tokens_per_minute": 10**6, "timeout": 10}
+            config.update(llm_config)
+            async with AsyncLLMEngine("test", "mock", config, base_url, max_retries) as engine:
+                replies = await asyncio.gather(*(engine.chat(MESSAGES) for _ in range(calls)))
+                return replies, engine.stats
+        return asyncio.run(run())
+
+    def test_concurrency_is_capped(self):
+        state = MockState(latency=0.3, rpm=0, fail_rate=0.0)
+        replies, stats = self.run_calls(self.start_server(state), calls=12, max_concurrency=4)
+        self.assertEqual(len(replies), 12)
+        self.assertEqual(stats["calls"], 12)
+        self.assertLessEqual(state.peak, 4)
+        self.assertGreater(state.peak, 1)
+
+    def test_rate_limited_calls_are_retried(self):
+        # Dos peticiones por medio segundo: el resto recibe 429 con Retry-After
+        state = MockState(latency=0.0, rpm=2, fail_rate=0.0, window=0.5)
+        replies, stats = self.run_calls(self.start_server(state), calls=4, max_retries=5)
+        self.assertEqual(len(replies), 4)
+        self.assertTrue(all(reply.startswith("Resumen simulado") for reply in replies))
+        self.assertGreater(state.rejected, 0)
+        self.assertGreaterEqual(stats["retries"], state.rejected)
+
+    def test_error_after_retries(self):
+        state = MockState(latency=0.0, rpm=0, fail_rate=1.0)
+        with self.assertRaises(LLMError):
+            self.run_calls(self.start_server(state), calls=1, max_retries=2)
+        self.assertEqual(state.served, 2)
+
+if __name__ == "__main__":
+    unittest.main()